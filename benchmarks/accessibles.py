@@ -0,0 +1,210 @@
+# -*- coding: UTF-8 -*-
+"""
+Synthetic accessible trees shaped like LibreOffice windows. Nodes mimic the
+dogtail Node API used by the steps and count every property read and child
+access, each of which is a D-Bus round trip to soffice in reality.
+"""
+
+
+class SearchError(Exception):
+    pass
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+class Bus(object):
+    """
+    Counts round trips, stops a lookup which went far over its budget
+    """
+    def __init__(self):
+        self.calls = 0
+        self.limit = None
+
+    def call(self):
+        self.calls += 1
+        if self.limit is not None and self.calls > self.limit:
+            raise BudgetExceeded("%d round trips" % self.calls)
+
+
+class Node(object):
+    def __init__(self, bus, roleName, name='', children=(), showing=True):
+        self.bus = bus
+        self._role = roleName
+        self._name = name
+        self._parent = None
+        self._showing = showing
+        self._children = []
+        for child in children:
+            self.add(child)
+
+    def add(self, child):
+        child._parent = self
+        self._children.append(child)
+        return child
+
+    @property
+    def name(self):
+        self.bus.call()
+        return self._name
+
+    @property
+    def roleName(self):
+        self.bus.call()
+        return self._role
+
+    @property
+    def showing(self):
+        self.bus.call()
+        return self._showing
+
+    @property
+    def text(self):
+        self.bus.call()
+        return self._name
+
+    @property
+    def parent(self):
+        self.bus.call()
+        return self._parent
+
+    @property
+    def childCount(self):
+        self.bus.call()
+        return self._count()
+
+    def _count(self):
+        return len(self._children)
+
+    def _child(self, index):
+        return self._children[index]
+
+    def __getitem__(self, index):
+        self.bus.call()
+        count = self._count()
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError(index)
+        return self._child(index)
+
+    def __len__(self):
+        return self.childCount
+
+    @property
+    def children(self):
+        return [self[x] for x in xrange(self.childCount)]
+
+    def _descendants(self):
+        # depth-first like pyatspi.findDescendant used by dogtail
+        for child in self.children:
+            yield child
+            for descendant in child._descendants():
+                yield descendant
+
+    def findChildren(self, predicate, recursive=True):
+        if not recursive:
+            return [x for x in self.children if predicate(x)]
+        return [x for x in self._descendants() if predicate(x)]
+
+    def findChild(self, predicate, recursive=True):
+        nodes = self.children if not recursive else self._descendants()
+        for node in nodes:
+            if predicate(node):
+                return node
+        raise SearchError()
+
+    def child(self, name=None, roleName=None, recursive=True):
+        return self.findChild(lambda x: (name is None or x.name == name) and
+                              (roleName is None or x.roleName == roleName), recursive)
+
+    def queryTable(self):
+        raise NotImplementedError("Table interface not implemented")
+
+
+class Table(Node):
+    """
+    Calc table with virtual cells, cells are made up when asked for
+    """
+    def __init__(self, bus, name, rows, columns):
+        super(Table, self).__init__(bus, 'table', name)
+        self.rows = rows
+        self.columns = columns
+
+    def _count(self):
+        return self.rows * self.columns
+
+    def _child(self, index):
+        row, column = divmod(index, self.columns)
+        cell = Node(self.bus, 'table cell', cell_name(row, column))
+        cell._parent = self
+        return cell
+
+    def queryTable(self):
+        self.bus.call()
+        return TableInterface(self)
+
+
+class TableInterface(object):
+    def __init__(self, table):
+        self.table = table
+
+    @property
+    def nColumns(self):
+        self.table.bus.call()
+        return self.table.columns
+
+    @property
+    def nRows(self):
+        self.table.bus.call()
+        return self.table.rows
+
+    def getAccessibleAt(self, row, column):
+        self.table.bus.call()
+        return self.table._child(row * self.table.columns + column)
+
+
+def cell_name(row, column):
+    name = ''
+    column += 1
+    while column:
+        column, rest = divmod(column - 1, 26)
+        name = chr(ord('A') + rest) + name
+    return "%s%d" % (name, row + 1)
+
+
+MENUS = ['File', 'Edit', 'View', 'Insert', 'Format', 'Styles', 'Sheet', 'Data', 'Tools', 'Window', 'Help']
+
+
+def calc_application(bus, rows=1000, columns=1000, items=20, buttons=30):
+    """
+    Returns soffice application with Calc window (table of rows x columns cells)
+    and Find & Replace dialog with search results
+    """
+    menu_bar = Node(bus, 'menu bar', children=[
+        Node(bus, 'menu', name, [Node(bus, 'menu item', '%s item %d' % (name, x)) for x in xrange(items)])
+        for name in MENUS])
+    tool_bars = [Node(bus, 'tool bar', 'Tool Bar %d' % x,
+                      [Node(bus, 'push button', 'Button %d' % y) for y in xrange(buttons)])
+                 for x in xrange(5)]
+    formula_bar = Node(bus, 'tool bar', 'Formula Tool Bar', [
+        Node(bus, 'combo box', 'Name Box'),
+        Node(bus, 'panel', 'Input line', [Node(bus, 'paragraph', '=SUM(A1:A9)')])])
+    spreadsheet = Node(bus, 'document spreadsheet', 'Untitled 1', [Table(bus, 'Sheet Sheet1', rows, columns)])
+    scroll_pane = Node(bus, 'scroll pane', children=[spreadsheet, Node(bus, 'panel', children=[
+        Node(bus, 'page tab list', children=[Node(bus, 'page tab', 'Sheet1')])])])
+    frame = Node(bus, 'frame', 'Untitled 1 - LibreOffice Calc', [
+        Node(bus, 'root pane', children=[menu_bar] + tool_bars + [
+            Node(bus, 'panel', children=[formula_bar, scroll_pane]),
+            Node(bus, 'status bar', children=[Node(bus, 'label', 'Sheet 1 of 1')])])])
+    results = Node(bus, 'table', 'Search Results', [
+        Node(bus, 'table cell', value)
+        for sheet in ['Sheet1', 'Sheet2', 'Sheet3'] for value in [sheet, '$A$1', 'Test']])
+    dialog = Node(bus, 'dialog', 'Find & Replace', [
+        Node(bus, 'panel', 'Search For', [Node(bus, 'combo box'), Node(bus, 'push button', 'Find All')]),
+        Node(bus, 'table', 'Sheets'), results,
+        Node(bus, 'check box', 'Other options'),
+        Node(bus, 'push button', 'Finish', showing=False),
+        Node(bus, 'push button', 'Close')])
+    return Node(bus, 'application', 'soffice', [frame, dialog])
@@ -0,0 +1,111 @@
+#!/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+Benchmark accessibility lookup idioms used by the steps on a synthetic
+LibreOffice tree (no display or LibreOffice needed). Every idiom has a
+budget of round trips and time, the run fails when one is exceeded.
+
+Example: python benchmarks/bench_lookups.py -r 5
+"""
+import argparse
+import imp
+import os
+import sys
+from time import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+from accessibles import Bus, BudgetExceeded, calc_application
+
+# calc.py does not need dogtail (the package __init__ does)
+calc = imp.load_source('lo_calc', os.path.join(BENCH_DIR, '..', 'lo_behave_common_steps', 'calc.py'))
+
+
+def spreadsheet(app):
+    return app[0].child(roleName='document spreadsheet')
+
+
+def table(app):
+    return spreadsheet(app)[0]
+
+
+# name, setup (not measured), lookup, budget of round trips, budget in ms
+IDIOMS = [
+    ('current window, findChildren(recursive=False)[-1]', lambda app: app,
+     lambda app: app.findChildren(lambda x: True, recursive=False)[-1], 5, 5),
+    ('document spreadsheet, child(roleName=...)', lambda app: app[0],
+     lambda frame: frame.child(roleName='document spreadsheet'), 1500, 50),
+    ('formula bar, .parent.parent + findChildren(recursive=False)', spreadsheet,
+     lambda sheet: sheet.parent.parent.findChildren(
+         lambda x: x.roleName == 'tool bar' and x.name == 'Formula Tool Bar',
+         recursive=False)[0].child(roleName='paragraph'), 20, 5),
+    ('page tab list, .parent[-1].child(...)', spreadsheet,
+     lambda sheet: sheet.parent[-1].child(roleName='page tab list'), 10, 5),
+    ('cell B2, index into table children', table,
+     lambda table: table[calc.CellAccessor(table).index('B2')], 5, 5),
+    ('cell ALL1000, CellAccessor.cell (cold)', table,
+     lambda table: calc.CellAccessor(table).cell('ALL1000'), 5, 5),
+    ('cell B2, CellAccessor.cell (cached)', lambda app: calc.CellAccessor(table(app)),
+     lambda cells: [cells.cell('B2') for x in xrange(100)], 5, 5),
+    ('range A1:D3, CellAccessor.rows', lambda app: calc.CellAccessor(table(app)),
+     lambda cells: cells.rows('A1:D3'), 20, 5),
+    ('range A1:CV100, CellAccessor.snapshot_range + checks', lambda app: calc.CellAccessor(table(app)),
+     lambda cells: cells.snapshot_range('A1:CV100').assert_unique(), 20010, 200),
+    ('search results, findChildren(table)[1].findChildren(table cell)', lambda app: app[-1],
+     lambda dialog: dialog.findChildren(lambda x: x.roleName == 'table')[1].findChildren(
+         lambda x: x.roleName == 'table cell'), 100, 5),
+    ('Finish button, findChildren(role, name, showing)', lambda app: app[-1],
+     lambda dialog: dialog.findChildren(
+         lambda x: x.roleName == 'push button' and x.name == 'Finish' and x.showing), 60, 5),
+]
+
+
+def measure(app, setup, lookup, budget, repeat):
+    """
+    Returns (round trips, best time in ms) of lookup, round trips are None
+    when the lookup went 10 times over budget and was stopped
+    """
+    target = setup(app)
+    calls, best = None, None
+    for run in xrange(repeat):
+        app.bus.calls = 0
+        app.bus.limit = budget * 10
+        start = time()
+        try:
+            lookup(target)
+        except BudgetExceeded:
+            return None, (time() - start) * 1000
+        finally:
+            app.bus.limit = None
+        elapsed = (time() - start) * 1000
+        # the first (cold) run counts for round trips
+        calls = max(calls or 0, app.bus.calls)
+        best = elapsed if best is None else min(best, elapsed)
+    return calls, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='runs of each lookup (best time counts)')
+    parser.add_argument('--rows', type=int, default=1000, help='rows of the Calc table')
+    parser.add_argument('--columns', type=int, default=1000, help='columns of the Calc table')
+    parser.add_argument('-k', dest='pattern', help='run only idioms containing pattern')
+    args = parser.parse_args()
+
+    app = calc_application(Bus(), args.rows, args.columns)
+    print("Calc table of %d cells" % (args.rows * args.columns))
+    failed = 0
+    for name, setup, lookup, budget, budget_ms in IDIOMS:
+        if args.pattern and args.pattern not in name:
+            continue
+        calls, ms = measure(app, setup, lookup, budget, args.repeat)
+        over = calls is None or calls > budget or ms > budget_ms
+        failed += over
+        print("%-4s %-70s %8s/%-5d round trips %8.2f/%d ms" % (
+            'FAIL' if over else 'ok', name, '>%d' % (budget * 10) if calls is None else calls,
+            budget, ms, budget_ms))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,59 @@
+#!/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+Print benchmark history recorded with LO_PROFILE: median time (and other
+measurements) of every benchmark per LibreOffice version, e.g. the scaling
+curve of Calc load time over document sizes.
+
+Example: python benchmarks/history.py -k "Calc load"
+"""
+import argparse
+import imp
+import os
+import sqlite3
+import sys
+
+# profiler.py does not need dogtail (the package __init__ does)
+profiler = imp.load_source('lo_profiler', os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'lo_behave_common_steps', 'profiler.py'))
+
+
+def collect(db, pattern=None):
+    """
+    Returns {(name, metric): {version: [values]}}, time is metric 'seconds'
+    """
+    found = {}
+    rows = db.execute("SELECT timings.name, runs.version, timings.seconds FROM timings "
+                      "JOIN runs ON runs.id = timings.run WHERE timings.kind = 'benchmark'").fetchall()
+    if db.execute("SELECT name FROM sqlite_master WHERE name = 'metrics'").fetchone():
+        rows += db.execute("SELECT metrics.name || '\t' || metrics.metric, runs.version, metrics.value "
+                           "FROM metrics JOIN runs ON runs.id = metrics.run").fetchall()
+    for name, version, value in rows:
+        name, metric = (name.split('\t') + ['seconds'])[:2]
+        if pattern and pattern not in name:
+            continue
+        found.setdefault((name, metric), {}).setdefault(version, []).append(value)
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--history', default=profiler.history_path(), help='history database')
+    parser.add_argument('-k', dest='pattern', help='show only benchmarks containing pattern')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.history):
+        print("No history in %s" % args.history)
+        return 1
+    found = collect(sqlite3.connect(args.history), args.pattern)
+    versions = sorted(set([x for values in found.values() for x in values]),
+                      key=lambda x: [int(y) if y.isdigit() else y for y in x.split('.')])
+    print(u"%-80s %-20s %s" % (u'benchmark', u'metric', u' '.join([u'%14s' % x for x in versions])))
+    for (name, metric), values in sorted(found.items()):
+        print((u"%-80s %-20s %s" % (name, metric, u' '.join(
+            [u'%14.3f' % profiler.median(values[x]) if x in values else u'%14s' % u'-' for x in versions]))).encode('utf-8'))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,7 +6,7 @@ Feature: LibreOffice Base tests
     * Start soffice via command with base parameter
     Then base document named like "Database Wizard" is displayed
     * Create database
-    * In dialog fill out path "/tmp", name "myDB1" and confirm
+    * In dialog fill out path "{sandbox}", name "myDB1" and confirm
     Then Window named "myDB1.odb - LibreOffice Base" is displayed
 
   @create_table_in_db
@@ -14,7 +14,7 @@ Feature: LibreOffice Base tests
     * Start soffice via command with base parameter
     Then base document named like "Database Wizard" is displayed
     * Create database
-    * In dialog fill out path "/tmp", name "myDB1" and confirm
+    * In dialog fill out path "{sandbox}", name "myDB1" and confirm
     Then Window named "myDB1.odb - LibreOffice Base" is displayed
 	  * Create table with name "Table2" in database with name "myDB1" in design mode
     Then Table with name "Table2" created
@@ -24,9 +24,9 @@ Feature: LibreOffice Base tests
     * Start soffice via command with base parameter
     Then base document named like "Database Wizard" is displayed
     * Create database
-    * In dialog fill out path "/tmp", name "myDB1" and confirm
+    * In dialog fill out path "{sandbox}", name "myDB1" and confirm
     Then Window named "myDB1.odb - LibreOffice Base" is displayed
-	  * Create table with name "mytable" in database with name "myDB1" in design mode
+    Given Table with name "mytable" exists in database with name "myDB1"
     Then Table with name "mytable" created
     * Open table "mytable" from main view
     * Enter records to table
@@ -37,11 +37,63 @@ Feature: LibreOffice Base tests
     * Start soffice via command with base parameter
     Then base document named like "Database Wizard" is displayed
     * Create database
-    * In dialog fill out path "/tmp", name "myDB1" and confirm
+    * In dialog fill out path "{sandbox}", name "myDB1" and confirm
     Then Window named "myDB1.odb - LibreOffice Base" is displayed
-    * Create table with name "mytable" in database with name "myDB1" in design mode
+    Given Table with name "mytable" exists in database with name "myDB1"
     Then Table with name "mytable" created
     * Open table "mytable" from main view
     * Enter non-english records to table
     Then Assert "non-english" records in table with name "mytable" in db "myDB1"
- 
\ No newline at end of file
+
+  @import_records_from_table
+  Scenario: Importing records from a table
+    * Start soffice via command with base parameter
+    Then base document named like "Database Wizard" is displayed
+    * Create database
+    * In dialog fill out path "{sandbox}", name "myDB1" and confirm
+    Then Window named "myDB1.odb - LibreOffice Base" is displayed
+    Given Table with name "contacts" and fields from table exists in database with name "myDB1"
+      | name        | type         |
+      | name        | VARCHAR(100) |
+      | address     | VARCHAR(100) |
+      | phoneNumber | VARCHAR(20)  |
+    Then Table with name "contacts" created
+    * Import records from table to table "contacts"
+      | ID | name        | address          | phoneNumber |
+      | 7  | Spider man  | Some address 225 | 123         |
+      | 8  | コンサート  | でした           | 124         |
+      | 9  | Thor        | Доброе утро!     | 12353       |
+    Then Table "contacts" in db "myDB1" has "3" records
+
+  @import_generated_records
+  Scenario Outline: Importing generated records
+    * Start soffice via command with base parameter
+    Then base document named like "Database Wizard" is displayed
+    * Create database
+    * In dialog fill out path "{sandbox}", name "myDB1" and confirm
+    Then Window named "myDB1.odb - LibreOffice Base" is displayed
+    Given Table with name "mytable" exists in database with name "myDB1"
+    Then Table with name "mytable" created
+    * Import "<count>" generated records to table "mytable"
+    Then Table "mytable" in db "myDB1" has "<count>" records
+
+  Examples: Sizes
+    | count |
+    | 10    |
+    | 1000  |
+
+  @import_generated_records_benchmark
+  Scenario Outline: Importing generated records benchmark
+    * Start soffice via command with base parameter
+    Then base document named like "Database Wizard" is displayed
+    * Create database
+    * In dialog fill out path "{sandbox}", name "myDB1" and confirm
+    Then Window named "myDB1.odb - LibreOffice Base" is displayed
+    Given Table with name "mytable" exists in database with name "myDB1"
+    Then Table with name "mytable" created
+    * Import "<count>" generated records to table "mytable"
+    Then Table "mytable" in db "myDB1" has "<count>" records
+
+  Examples: Sizes
+    | count  |
+    | 100000 |
@@ -10,6 +10,17 @@ Feature: LibreOffice Calc tests
     * Remove values with shortcut ctrl+z
     Then Correct sum under values
 
+  @fill_range_from_table
+  Scenario: Fill range from table
+    * Start soffice via command with calc parameter
+    Then Calc document named like "Untitled 1" is displayed
+    * Fill range "A1:C3" with values from table
+      | name       | count | price    |
+      | apple      | 3     | 1.5      |
+      | コンサート | 12    | -564.124 |
+    Then Data "コンサート" added to cell "Cell A3"
+    Then Data "-564.124" added to cell "Cell C3"
+
   @random_number_generator
   Scenario: Random number generator
     * Start soffice via command with calc parameter
@@ -34,15 +45,16 @@ Feature: LibreOffice Calc tests
     Then Data "-564.124" added to cell "Cell B2"
     * Select "File -> Save" menu
     Then Dialog window named "Save" is displayed
-    * In dialog fill out path "/tmp/test_files", name "tmp.ods" and confirm
-    Then Check file "tmp.ods" in "/tmp/test_files" exists
+    * In dialog fill out path "{sandbox}/test_files", name "tmp.ods" and confirm
+    Then Check file "tmp.ods" in "{sandbox}/test_files" exists
+    Then All data in table are consistent in file "tmp.ods" in "{sandbox}/test_files"
     * Select "File -> Exit LibreOffice" menu
     Then soffice shouldn't be running anymore
     * Start soffice via command with calc parameter
     Then Calc document named like "Untitled 1" is displayed
     * Select "File -> Open..." menu
     Then Dialog window named "Open" is displayed
-    * In Open dialog select "tmp.ods" from "/tmp/test_files"
+    * In Open dialog select "tmp.ods" from "{sandbox}/test_files"
     Then Calc document named like "tmp.ods" is displayed
     Then All data in table are consistent
     * Add "コート" to cell "Cell A1" table
@@ -50,11 +62,12 @@ Feature: LibreOffice Calc tests
     * Select "File -> Save" menu
     * Select "File -> Exit LibreOffice" menu
     Then soffice shouldn't be running anymore
+    Then All data in table are consistent in file "tmp.ods" in "{sandbox}/test_files"
     * Start soffice via command with calc parameter
     Then Calc document named like "Untitled 1" is displayed
     * Select "File -> Open..." menu
     Then Dialog window named "Open" is displayed
-    * In Open dialog select "tmp.ods" from "/tmp/test_files"
+    * In Open dialog select "tmp.ods" from "{sandbox}/test_files"
     Then Calc document named like "tmp.ods" is displayed
     Then All data in table are consistent
 
@@ -67,19 +80,19 @@ Feature: LibreOffice Calc tests
     Then Dialog frame window named "PDF Options" is displayed
     * Click the "Export" button in dialog window
     Then Dialog window named "Export" is displayed
-    * In dialog fill out path "/tmp/test_files", name "test" and confirm
-    Then Check file "test.pdf" in "/tmp/test_files" exists
+    * In dialog fill out path "{sandbox}/test_files", name "test" and confirm
+    Then Check file "test.pdf" in "{sandbox}/test_files" exists
 
 
   @find_in_all_sheets
   Scenario: Find in all sheets
     * Start soffice via command with Calc parameter
     Then soffice should start
-    * Add sheet named "Sheet2"
-    * Add sheet named "Sheet3"
-    * Add "Test" to cell "Cell A1" in table in sheet named "Sheet1"
-    * Add "Test" to cell "Cell A1" in table in sheet named "Sheet2"
-    * Add "Test" to cell "Cell A1" in table in sheet named "Sheet3"
+    Given Sheet named "Sheet2" exists
+    And Sheet named "Sheet3" exists
+    And Cell "Cell A1" in sheet named "Sheet1" contains "Test"
+    And Cell "Cell A1" in sheet named "Sheet2" contains "Test"
+    And Cell "Cell A1" in sheet named "Sheet3" contains "Test"
     * Select "Edit -> Find & Replace..." menu
     Then Dialog frame window named "Find & Replace" is displayed
     * Type "Test" and check option search in all sheets and confirm
@@ -95,12 +108,12 @@ Feature: LibreOffice Calc tests
     * Add "-564.12" to cell "Cell A2" table
     Then Data "コンサート" added to cell "Cell A1"
     Then Data "-564.12" added to cell "Cell A2"
-    * Save document and close "tmp" with path "/tmp/test_files" as extension "(.xls)"
+    * Save document and close "tmp" with path "{sandbox}/test_files" as extension "(.xls)"
     Then soffice shouldn't be running anymore
     * Start soffice via command with Calc parameter
     * Select "File -> Open..." menu
     Then Dialog window named "Open" is displayed
-    * In Open dialog select "tmp.xls" from "/tmp/test_files"
+    * In Open dialog select "tmp.xls" from "{sandbox}/test_files"
     Then Calc document named like "tmp" is displayed
     Then Data "コンサート" added to cell "Cell A1"
     Then Data "-564.12" added to cell "Cell A2"
@@ -122,6 +135,7 @@ Feature: LibreOffice Calc tests
     Then Data "$3,654" added to cell "Cell A2"
     Then Data "-$25,143,542" added to cell "Cell B1"
     Then Data "-$564" added to cell "Cell B2"
+    Then All data in table have dollar format consistent
 
 
   @math_between_string_and_number
@@ -140,3 +154,16 @@ Feature: LibreOffice Calc tests
     * Make sheet as protected
     * Add "a" to cell "Cell A1" table
     Then Dialog window named like "LibreOffice" is displayed
+
+  @calc_load_benchmark
+  Scenario Outline: Load time of generated spreadsheets
+    Given Spreadsheet with "<rows>" rows, "<columns>" columns, "<sheets>" sheets, "<formulas>" formulas and "<strings>" strings is generated
+    * Open generated spreadsheet and measure time to first cell
+    Then Calc document named like "calc-<rows>x<columns>x<sheets>" is displayed
+
+  Examples: Sizes
+    | rows   | columns | sheets | formulas | strings |
+    | 100    | 10      | 1      | 0.1      | 0.3     |
+    | 10000  | 20      | 1      | 0.1      | 0.3     |
+    | 100000 | 20      | 1      | 0.1      | 0.3     |
+    | 100000 | 20      | 5      | 0.2      | 0.5     |
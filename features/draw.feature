@@ -28,5 +28,5 @@ Feature: LibreOffice Draw tests
     Then Draw document named like "Untitled" is displayed
     * Select "Insert -> Image..." menu
     Then Dialog window named "Insert Image" is displayed
-    * In Open dialog select "svg_file.svg" from "/tmp/test_files"
+    * In Open dialog select "svg_file.svg" from "{sandbox}/test_files"
     Then Document contains an image called "GraphicObjectShape "
@@ -1,21 +1,50 @@
 # -*- coding: UTF-8 -*-
 
 import os
+import shutil
 from behave_common_steps import dummy#, App
 from lo_behave_common_steps import LOApp
+from lo_behave_common_steps.text import typing_counters
+from lo_behave_common_steps.sandbox import Sandbox, COPIED_EXTENSIONS
+from lo_behave_common_steps.paths import set_sandbox
+from lo_behave_common_steps.profile import ProfileCache, libreoffice_version
+from lo_behave_common_steps.profiler import Profiler
+from lo_behave_common_steps.crashes import CrashWatcher
+from lo_behave_common_steps.screenshot import Screenshots
+from lo_behave_common_steps.journal import JournalCollector
+from lo_behave_common_steps.idle import settle_times
+from lo_behave_common_steps.events import wait_for
 from dogtail.config import config
-from time import sleep, localtime, strftime
+from behave.step_registry import registry
 import problem
 
 
+def remove_profile():
+    """Remove LibreOffice user profile
+    """
+    shutil.rmtree(os.path.join(os.path.expanduser('~'), '.config', 'libreoffice'), ignore_errors=True)
+
+
+def startup_time(app):
+    """Total time soffice has been starting so far
+    """
+    return sum(app.coldStarts) + sum(app.warmStarts)
+
+
 def before_all(context):
     """Setup soffice stuff
     Being executed before all features
     """
 
+    context.profiler = None
     try:
-        # Cleanup abrt crashes
+        # Cleanup abrt crashes and watch for new ones
         [x.delete() for x in problem.list()]
+        context.crashes = CrashWatcher()
+        context.crashes.start()
+
+        # Failure screenshots are encoded in background
+        context.screenshots = Screenshots()
 
         # Skip dogtail actions to print to stdout
         config.logDebugToStdOut = False
@@ -27,29 +56,86 @@ def before_all(context):
         # Kill initial setup
         os.system("killall /usr/libexec/gnome-initial-setup")
 
-        # Store scenario start time for session logs
-        context.log_start_time = strftime("%Y-%m-%d %H:%M:%S", localtime())
-
-        context.app = LOApp('soffice', forceKill=True, parameters='--norecovery')
+        # Session logs, each scenario gets messages logged since the previous one
+        context.journal = JournalCollector('/usr/bin/gnome-session')
+
+        # Set LO_REUSE_SESSION to keep soffice running between scenarios,
+        # LO_UNO_BRIDGE to set up documents through UNO in "Given" steps
+        context.app = LOApp('soffice', forceKill=True, parameters='--norecovery',
+                            reuseSession=bool(os.environ.get('LO_REUSE_SESSION')),
+                            unoBridge=bool(os.environ.get('LO_UNO_BRIDGE')))
+
+        # Private directory with test files, {sandbox} in feature files
+        context.sandbox = Sandbox(os.path.join(os.getcwd(), 'test_files'))
+        context.sandbox.prepare()
+        set_sandbox(context.sandbox.path)
+
+        # soffice started via command uses pristine profile linked like test
+        # files, the default profile when the pristine one cannot be built
+        context.profile = None
+        try:
+            # soffice rewrites configuration (.xcu) on exit, it gets own copy
+            context.profile = Sandbox(ProfileCache().build(), root=context.sandbox.root, prefix='profile',
+                                      copied=COPIED_EXTENSIONS + ['.xcu'])
+            context.profile.prepare()
+            context.app.userInstallation = os.path.join(context.profile.path, context.profile.name)
+        except Exception as e:
+            print("Using default LibreOffice profile: %s" % e)
+            context.profile = None
+
+        # Set LO_PROFILE to directory for step timings report (history is kept in ~/.cache)
+        if os.environ.get('LO_PROFILE'):
+            context.profiler = Profiler(libreoffice_version(),
+                                        threshold=float(os.environ.get('LO_PROFILE_THRESHOLD', 1.5)))
+            context.profiler.instrument(registry, os.path.join(os.path.dirname(__file__), 'steps'))
 
     except Exception as e:
         print("Error in before_all: %s" % e.message)
 
 def before_scenario(context, scenario):
+    context.crash_detected = False
+    context.CELLS_INDEX_TEXT = {}
+    # (sheet, cell, text) added by steps of the scenario
+    context.ADDED_CELLS = []
+    context.step_stats = []
     try:
-        # Do the cleanup
-        os.system("python cleanup.py > /dev/null")
-        context.CELLS_INDEX_TEXT = {}
+        # Do the cleanup (running soffice is using the profile)
+        context.sandbox.reset()
+        if not context.app.isRunning():
+            if context.profile:
+                context.profile.reset()
+            # started via menu
+            remove_profile()
+        settle_times()
+        if context.profiler:
+            context.profiler.start_scenario()
     except Exception as e:
         print("Error in before_scenario: %s" % e.message)
 
+def before_step(context, step):
+    try:
+        # Remember a11y cache and typing counters to report them per step
+        context.step_counters = context.app.cache.counters() + typing_counters()
+        context.step_startup = startup_time(context.app)
+        if context.profiler:
+            context.profiler.start_step()
+    except Exception as e:
+        print("Error in before_step: %s" % e.message)
+
 def after_step(context, step):
     """Teardown after each step.
     Here we make screenshot and embed it (if one of formatters supports it)
     """
     try:
-        if problem.list():
-            problems = problem.list()
+        counters = context.app.cache.counters() + typing_counters()
+        context.step_stats.append((step.name,) + tuple(
+            [after - before for after, before in zip(counters, context.step_counters)]))
+        if context.profiler:
+            context.profiler.add_startup(startup_time(context.app) - context.step_startup)
+            context.profiler.end_step(context.feature.name, context.scenario.name, step.name)
+
+        problems = context.crashes.drain()
+        if problems:
             for crash in problems:
                 if hasattr(context, "embed"):
                     context.embed('text/plain', "abrt has detected a crash: %s" % crash.reason)
@@ -58,12 +144,12 @@ def after_step(context, step):
 
             # Crash was stored, so it is safe to remove it now
             [x.delete() for x in problems]
+            context.crash_detected = True
 
         if step.status == 'failed':
-            # Make screnshot if step has failed
+            # Grab the failing window, it is embedded in after_scenario
             if hasattr(context, "embed"):
-                os.system("gnome-screenshot -f /tmp/screenshot.jpg")
-                context.embed('image/jpg', open("/tmp/screenshot.jpg", 'r').read())
+                context.screenshots.take(step.name, context.app.windows.current())
 
             # Test debugging - set DEBUG_ON_FAILURE to drop to ipdb on step failure
             if os.environ.get('DEBUG_ON_FAILURE'):
@@ -76,23 +162,70 @@ def after_step(context, step):
 def after_scenario(context, scenario):
     """Teardown for each scenario
     Kill soffice (in order to make this reliable we send sigkill)
+    In session reuse mode soffice is killed only if it cannot be reset
     """
     try:
-        # Stop gnome-weather
-        os.system("killall soffice.bin &> /dev/null")
-
-        # Attach journalctl logs
-        if hasattr(context, "embed"):
-            os.system("sudo journalctl /usr/bin/gnome-session --no-pager -o cat --since='%s'> /tmp/journal-session.log" % context.log_start_time)
-            data = open("/tmp/journal-session.log", 'r').read()
-            if data:
-                context.embed('text/plain', data)
+        if context.profiler:
+            context.profiler.end_scenario(context.feature.name, scenario.name)
 
-        # Make some pause after scenario
-        sleep(1)
+        warm = context.app.reuseSession and not context.crash_detected and \
+            context.app.isRunning() and context.app.reset_session()
+        if not warm:
+            context.app.kill_session()
 
-        # Do the cleanup
-        os.system("python cleanup.py")
+        # Attach failure screenshots encoded while soffice was being killed,
+        # the ones not finished yet are written to files
+        if hasattr(context, "embed"):
+            for label, mime, data in context.screenshots.done():
+                if data:
+                    context.embed(mime, data)
+                else:
+                    context.embed('text/plain', "No screenshot: %s" % label)
+
+        # Attach a11y cache hits/misses and time saved by text injection per step
+        if hasattr(context, "embed") and context.step_stats:
+            context.embed('text/plain', "\n".join(
+                ["a11y cache hits: %d, misses: %d, injected texts: %d, typing saved: %.1fs - %s"
+                 % (hits, misses, injected, saved, name)
+                 for name, hits, misses, injected, saved in context.step_stats]))
+
+        # Attach time soffice took to settle where steps used to sleep
+        settled = settle_times()
+        if hasattr(context, "embed") and settled:
+            context.embed('text/plain', "\n".join(
+                ["settled in %.2fs%s, fixed delay was %ss - %s"
+                 % (seconds, '' if idle else ' (timeout)', replaces, label)
+                 for label, replaces, seconds, idle in settled]))
+
+        # Attach session logs
+        data = context.journal.read()
+        if data and hasattr(context, "embed"):
+            context.embed('text/plain', data)
+
+        if not warm:
+            # Wait until killed soffice processes are gone instead of a fixed pause
+            if not wait_for(lambda: not context.app.isRunning(), timeout=10, poll=0.1):
+                print("soffice is still running after the scenario")
     except Exception as e:
         # Stupid behave simply crashes in case exception has occurred
         print("Error in after_scenario: %s" % e.message)
+
+
+def after_all(context):
+    """Report soffice sessions reused between scenarios and step timings,
+    remove the sandbox
+    """
+    try:
+        context.crashes.stop()
+        # Let screenshots handed over to files be written
+        context.screenshots.done(wait=True)
+        context.sandbox.remove()
+        if context.profile:
+            context.profile.remove()
+        if context.app.reuseSession:
+            print(context.app.session_report())
+        if context.profiler:
+            for kind, name, current, before in context.profiler.report(os.environ['LO_PROFILE']):
+                print("Slower %s: %s - median %.2fs, was %.2fs" % (kind, name, current, before))
+    except Exception as e:
+        print("Error in after_all: %s" % e.message)
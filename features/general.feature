@@ -101,7 +101,7 @@ Feature: General actions
     Then <component> document named like "Untitled" is displayed
     * Select "File -> Open..." menu
     Then Dialog window named "Open" is displayed
-    * In Open dialog select "<filename>" from "/tmp/test_files"
+    * In Open dialog select "<filename>" from "{sandbox}/test_files"
     Then <component> document named like "<filename>" is displayed
 
   Examples: Component files
@@ -111,6 +111,23 @@ Feature: General actions
     | Writer    | writer.odt  |
     | Draw      | draw.odg    |
 
+  @soffice_file_open_benchmark
+  Scenario Outline: Open file via menu benchmark
+    * Start soffice via command with <component> parameter
+    Then <component> document named like "Untitled" is displayed
+    * Open "<filename>" from "{sandbox}/test_files" via menu "<repeat>" times in <session> session
+
+  Examples: Component files
+    | component | filename    | repeat | session |
+    | Impress   | impress.odp | 10     | warm    |
+    | Calc      | calc.ods    | 10     | warm    |
+    | Writer    | writer.odt  | 10     | warm    |
+    | Draw      | draw.odg    | 10     | warm    |
+    | Impress   | impress.odp | 5      | cold    |
+    | Calc      | calc.ods    | 5      | cold    |
+    | Writer    | writer.odt  | 5      | cold    |
+    | Draw      | draw.odg    | 5      | cold    |
+
   @soffice_export_pdf
   Scenario Outline: Export PDF file via menu
     * Start soffice via command with <component> parameter
@@ -119,8 +136,8 @@ Feature: General actions
     Then Window named "PDF Options" is displayed
     * Click the "Export" button in dialog window
     Then Dialog window named "Export" is displayed
-    * In dialog fill out path "/tmp/test_files", name "<filename>" and confirm
-    Then Check file "<filename>" in "/tmp/test_files" exists
+    * In dialog fill out path "{sandbox}/test_files", name "<filename>" and confirm
+    Then Check file "<filename>" in "{sandbox}/test_files" exists
 
   Examples: Component files
     | component | filename    |
@@ -136,8 +153,8 @@ Feature: General actions
     * Insert example data into <component> document
     * Select "File -> Save" menu
     Then Dialog window named "Save" is displayed
-    * In dialog fill out path "/tmp/test_files", name "<filename>" and confirm
-    Then Check file "<filename>" in "/tmp/test_files" exists
+    * In dialog fill out path "{sandbox}/test_files", name "<filename>" and confirm
+    Then Check file "<filename>" in "{sandbox}/test_files" exists
 
   Examples: Component files
     | component | filename       |
@@ -145,3 +162,13 @@ Feature: General actions
     | Calc      | calc_ex.ods    |
     | Writer    | writer_ex.odt  |
     | Draw      | draw_ex.odg    |
+
+  @headless_conversion_matrix
+  Scenario Outline: Convert files headless to all formats and back
+    * Convert "<copies>" copies of documents in "{sandbox}/test_files" to all formats headless
+    Then All converted documents keep their content
+
+  Examples: Copies of component files
+    | copies |
+    | 1      |
+    | 20     |
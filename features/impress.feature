@@ -59,16 +59,15 @@ Feature: LibreOffice Impress tests
   Scenario: Exporting Non-English MS PowerPoint format 
     * Start soffice via command with Impress parameter
     Then Impress document named like "Untitled" is displayed
-    * Select "Insert -> Slide" menu
+    Given Slide "1" contains text "Доброе утро!"
+    And Slide "2" contains text "コンサート"
     Then Total number of slides is 2
-    * Insert to slide "1" text "Доброе утро!"
-    * Insert to slide "2" text "コンサート"
-    * Save document and close "tmp" with path "/tmp/test_files" as extension "(.ppt)"
+    * Save document and close "tmp" with path "{sandbox}/test_files" as extension "(.ppt)"
     Then soffice shouldn't be running anymore
     * Start soffice via command with impress parameter
     * Select "File -> Open..." menu
     Then Dialog window named "Open" is displayed
-    * In Open dialog select "tmp.ppt" from "/tmp/test_files"
+    * In Open dialog select "tmp.ppt" from "{sandbox}/test_files"
     Then Impress document named like "tmp" is displayed
     Then Slide "1" include text "Доброе утро!"
     Then Slide "2" include text "コンサート" 
\ No newline at end of file
@@ -1,6 +1,9 @@
 # -*- coding: UTF-8 -*-
 
-from behave import step
+import os
+from time import time
+
+from behave import step, given
 
 from dogtail import predicate
 from dogtail.tree import root
@@ -10,6 +13,14 @@ from behave_common_steps.dialogs import *
 from dogtail.rawinput import keyCombo, typeText, pressKey, drag
 from general import window_is_displayed, select_menuitem
 from dogtail.procedural import FocusWidget, FocusWindow
+from lo_behave_common_steps.text import insert_text
+from lo_behave_common_steps.selectors import select_one
+from lo_behave_common_steps.idle import wait_until_idle
+from lo_behave_common_steps.events import wait_for
+from lo_behave_common_steps.odb import iter_rows
+from lo_behave_common_steps.clipboard import set_clipboard_html
+from lo_behave_common_steps.records import generated_csv, read_csv, to_html
+from lo_behave_common_steps.paths import resolve_path
 
 
 # TABLE_FIELDS and TABLE_RECORDS are strictli connected to each other! 
@@ -70,49 +81,39 @@ TABLE_RECORDS_NON_ENGLISH = [
 
 @step(u'Create database')
 def create_database(context):
-    context.app.get_current_window().findChildren(
-        lambda x: x.roleName == 'push button' and x.name == 'Finish' and x.showing)[0].click()
+    select_one(context.app.get_current_window(), 'push-button[name=Finish]:showing').click()
 
 
 @step(u'Create table with name "{name}" in database with name "{dbname}" in design mode')
-def create_table_in_design_mode(context, name, dbname):
+def create_table_in_design_mode(context, name, dbname, fields=None):
+    """
+    Fields are dicts with name and description, all of them get the default type (Text)
+    """
     select_menuitem(context, "Insert -> Table Design...")
     window_is_displayed(context, dbname + ".odb : " + "Table1" + " - LibreOffice Base: Table Design")
     # fill out values for table
     create_table_window = context.app.get_current_window()
-    master_table = create_table_window.findChildren(lambda x: x.roleName == 'table' and x.name == 'Table')[0]
+    master_table = select_one(create_table_window, 'table[name=Table]')
 
     # this part is kind of magic - it uses TAB for moving in table and grabFocus
     # and typeText because original type text on object of table is not implemented in current version of dogtail
     master_table[1].grabFocus()
-    typeText(TABLE_FIELDS[0]['name'])
-
-    pressKey('\t')
-    pressKey('\t')
-    typeText(TABLE_FIELDS[0]['description'])
-
-    pressKey('\t')
-
-    typeText(TABLE_FIELDS[1]['name'])
-    pressKey('\t')
-    pressKey('\t')
-    typeText(TABLE_FIELDS[1]['description'])
-
-    pressKey('\t')
-
-    typeText(TABLE_FIELDS[2]['name'])
-    pressKey('\t')
-    pressKey('\t')
-    typeText(TABLE_FIELDS[2]['description'])
+    for number, field in enumerate(fields or TABLE_FIELDS):
+        if number:
+            pressKey('\t')
+        typeText(field['name'])
+        pressKey('\t')
+        pressKey('\t')
+        if field.get('description'):
+            typeText(field['description'])
 
     # click na save as
-    create_table_window.findChildren(lambda x: x.roleName == 'push button' and x.name == 'Save' and x.showing)[
-        0].click()
+    select_one(create_table_window, 'push-button[name=Save]:showing').click()
     dialog = context.app.get_current_window()
-    sleep(2)
+    wait_until_idle(context.app, replaces=2)
     assert dialog.name == 'Save As', "probably bad dialog because name of dialog should be Save as, but was '%s'" % (
         dialog.name)
-    dialog.textentry('Table Name').typeText(name)
+    insert_text(dialog.textentry('Table Name'), name)
     dialog.button('OK').click()
 
     if context.app.get_current_window().name == 'LibreOffice Base':
@@ -121,6 +122,29 @@ def create_table_in_design_mode(context, name, dbname):
     keyCombo('<Control>w')
 
 
+@given(u'Table with name "{name}" exists in database with name "{dbname}"')
+def table_exists(context, name, dbname, fields=None):
+    fields = fields or TABLE_FIELDS
+    bridge = context.app.uno()
+    if bridge:
+        # the same table as design mode creates (with primary key)
+        columns = ['"ID" INTEGER GENERATED BY DEFAULT AS IDENTITY(START WITH 0) NOT NULL PRIMARY KEY'] + \
+            ['"%s" %s' % (field['name'], field.get('sql', 'VARCHAR(100)')) for field in fields]
+        bridge.execute_sql(['CREATE TABLE "%s" (%s)' % (name, ', '.join(columns))])
+    else:
+        create_table_in_design_mode(context, name, dbname, fields)
+
+
+@given(u'Table with name "{name}" and fields from table exists in database with name "{dbname}"')
+def table_with_fields_exists(context, name, dbname):
+    """
+    Behave table has columns name and type (SQL type, used only through UNO)
+    """
+    fields = [{'name': row['name'], 'sql': row['type'] if 'type' in row.headings else 'VARCHAR(100)'}
+              for row in context.table]
+    table_exists(context, name, dbname, fields)
+
+
 @then(u'Table with name "{name}" created')
 def table_created(context, name):
     # assert here that on main page of app is table created
@@ -134,8 +158,7 @@ def open_table_from_main_view(context, tbname):
 
 @step(u'Enter records to table')
 def enter_records_to_table(context):
-    table = context.app.get_current_window().findChildren(
-        lambda x: x.roleName == 'table' and x.name == 'Table' and x.showing)[0]
+    table = select_one(context.app.get_current_window(), 'table[name=Table]:showing')
     table[1].grabFocus()
     for record in TABLE_RECORDS:
         typeText(record['id'])
@@ -146,44 +169,52 @@ def enter_records_to_table(context):
         pressKey('\t')
         typeText(record['phone'])
         pressKey('\t')
-    context.app.get_current_window().findChildren(
-        lambda x: x.roleName == 'push button' and x.name == 'Save current record' and x.showing)[0].click()
+    select_one(context.app.get_current_window(), 'push-button[name="Save current record"]:showing').click()
     # close edit table window
     keyCombo('<Control>w')
 
 
+def insert_to_focused_field(table, text):
+    """
+    Insert text to the field of the grid being edited (typed when there is
+    no focused field)
+    """
+    field = table.findChild(lambda x: x.focused, retry=False, requireResult=False)
+    if field is None:
+        typeText(text)
+    else:
+        insert_text(field, text)
+
+
 @step(u'Enter non-english records to table')
-def enter_records_to_table(context):
-    table = context.app.get_current_window().findChildren(
-        lambda x: x.roleName == 'table' and x.name == 'Table' and x.showing)[0]
+def enter_non_english_records_to_table(context):
+    table = select_one(context.app.get_current_window(), 'table[name=Table]:showing')
     table[1].grabFocus()
     for record in TABLE_RECORDS_NON_ENGLISH:
-        typeText(record['id'])
-        pressKey('\t')
-        typeText(record['name'])
-        pressKey('\t')
-        typeText(record['address'])
-        pressKey('\t')
-        typeText(record['phone'])
-        pressKey('\t')
-    sleep(10)
-    context.app.get_current_window().findChildren(
-        lambda x: x.roleName == 'push button' and x.name == 'Save current record' and x.showing)[0].click()
+        for field in ['id', 'name', 'address', 'phone']:
+            insert_to_focused_field(table, record[field])
+            pressKey('\t')
+    wait_until_idle(context.app, replaces=10)
+    select_one(context.app.get_current_window(), 'push-button[name="Save current record"]:showing').click()
     # close edit table window
     keyCombo('<Control>w')
 
 
-@then(u'Assert "{type_of_records}" records in table with name "{tbname}" in db "{dbname}"')
-def table_created(context, type_of_records, tbname, dbname):
-    button = context.app.get_current_window().findChildren(lambda x: x.roleName == 'tree item' and x.text == tbname)[0]
-    button.doubleClick()
+def save_database(context, dbname):
+    """
+    Store the database document (records reach the .odb file only then), returns its path
+    """
+    path = os.path.join(os.path.dirname(context.last_saved_path), dbname + '.odb')
+    saved = os.path.getmtime(path)
+    keyCombo('<Control>s')
+    assert wait_for(lambda: os.path.getmtime(path) != saved, timeout=10), "%s was not saved" % path
+    wait_until_idle(context.app)
+    return path
 
-    if button.showing:
-        button.doubleClick()
 
-    w = context.app.get_current_window()
-    table = w.findChildren(lambda x: x.roleName == 'table' and x.name == 'Table' and x.showing)[0]
-    i = 1
+@then(u'Assert "{type_of_records}" records in table with name "{tbname}" in db "{dbname}"')
+def records_in_table(context, type_of_records, tbname, dbname):
+    path = save_database(context, dbname)
 
     tab_rec = []
     if type_of_records == "non-english":
@@ -191,33 +222,77 @@ def table_created(context, type_of_records, tbname, dbname):
     if type_of_records == "english":
         tab_rec = TABLE_RECORDS
 
-    for record in tab_rec:
-
-        assert table[i].text == record['id'],\
-            "Incorrect text in column " + "id" + " and row " + str(i) + ", expected '%s' but was '%s'" % (
-            record['id'], table[i].text)
-        assert table[i + 1].text == record['name'],\
-            "Incorrect text in column " + "name" + " and row " + str(i) + ", expected '%s' but was '%s'" % (
-            record['name'], table[i + 1].text)
-        assert table[i + 2].text == record['address'],\
-            "Incorrect text in column " + "address" + " and row " + str(i) + ", expected '%s' but was '%s'" % (
-            record['address'], table[i + 2].text)
-        # there is commented assert for last column in table because thrue the accessibility its imposible to reach it
-        # assert table[i+3].text == record['phone'], "Incorrect text in paragraph,\
-        #  expected '%s' but was '%s'" % (record['phone'], table[i+3].text)
-        i += len(record)
-
-    j = 1
-    for record in tab_rec:
-        table[j].grabFocus()
-        for i in range(0, len(tab_rec[0])-1):
-            pressKey('\t')
-        keyCombo('<Control>c')
-        table[j+1].grabFocus()
-        keyCombo('<Control>a')
-        keyCombo('<Control>v')
-        keyCombo('<Enter>')
-        assert table[j+1].text == record['phone'], "Incorrect text in paragraph, expected '%s' but was '%s'" % (
-            record['phone'], table[j+1].text)
-
-        j += len(tab_rec[0])
\ No newline at end of file
+    # rows of the embedded database are in order of the primary key (id)
+    rows = list(iter_rows(path, tbname))
+    assert len(rows) == len(tab_rec), "Table %s has %d records, expected %d" % (tbname, len(rows), len(tab_rec))
+    for row, record in zip(rows, tab_rec):
+        expected = [record[x].decode('utf-8') for x in ['id', 'name', 'address', 'phone']]
+        actual = [unicode(x) for x in row]
+        assert actual == expected, "Incorrect record in table %s, expected '%s' but was '%s'" % (
+            tbname, u', '.join(expected), u', '.join(actual))
+
+
+def paste_records(context, tbname, columns, rows):
+    """
+    Paste records as HTML to the database window, Copy Table wizard appends them to table
+    """
+    window = context.app.get_current_window()
+    set_clipboard_html(to_html(columns, rows))
+    select_one(window, 'tree-item[name="%s"]' % tbname).click()
+    keyCombo('<Control>v')
+    wizard = context.app.windows.wait_for_window(like='Copy Table', timeout=30)
+    assert wizard, "Copy Table wizard was not displayed after paste"
+    select_one(wizard, 'radio-button[name="Append data"]').click()
+    insert_text(select_one(wizard, 'text[name="Table name:"]'), tbname)
+    select_one(wizard, 'push-button[name=Create]:showing').click()
+    assert context.app.windows.wait_for_window(predicate=lambda x: 'Copy Table' not in x.name, timeout=3600), \
+        "Copy Table wizard did not finish"
+
+
+def import_records(context, tbname, columns, rows, count):
+    """
+    Load rows to table in one bulk operation (prepared statement batches
+    through UNO, otherwise paste to Copy Table wizard) and report its time
+    """
+    start = time()
+    bridge = context.app.uno()
+    if bridge:
+        method = 'UNO'
+        bridge.insert_rows(tbname, columns, rows)
+    else:
+        method = 'paste'
+        paste_records(context, tbname, columns, rows)
+        wait_until_idle(context.app)
+    seconds = time() - start
+    message = u"Imported %d records to %s via %s in %.2fs (%.0f records/s)" % (
+        count, tbname, method, seconds, count / max(seconds, 0.001))
+    if context.profiler:
+        context.profiler.record_benchmark(u"Base import of %d records via %s" % (count, method), seconds)
+    if hasattr(context, "embed"):
+        context.embed('text/plain', message)
+
+
+@step(u'Import records from table to table "{tbname}"')
+def import_records_from_table(context, tbname):
+    """
+    Headings of the behave table are column names
+    """
+    rows = [list(row.cells) for row in context.table]
+    import_records(context, tbname, list(context.table.headings), rows, len(rows))
+
+
+@step(u'Import "{count}" generated records to table "{tbname}"')
+def import_generated_records(context, count, tbname):
+    """
+    Records are generated to CSV file in the sandbox and streamed from it
+    """
+    columns = ['ID'] + [field['name'] for field in TABLE_FIELDS]
+    columns, rows = read_csv(generated_csv(resolve_path('{sandbox}'), int(count), columns))
+    import_records(context, tbname, columns, rows, int(count))
+
+
+@then(u'Table "{tbname}" in db "{dbname}" has "{count}" records')
+def table_has_records(context, tbname, dbname, count):
+    path = save_database(context, dbname)
+    found = sum(1 for row in iter_rows(path, tbname))
+    assert found == int(count), "Table %s has %d records, expected %s" % (tbname, found, count)
@@ -1,4 +1,6 @@
 # -*- coding: UTF-8 -*-
+import shutil
+from time import time
 
 from behave import step
 
@@ -8,6 +10,11 @@ from behave_common_steps.app import *
 from behave_common_steps.appmenu import *
 from behave_common_steps.dialogs import *
 from dogtail.rawinput import keyCombo, typeText, pressKey
+from lo_behave_common_steps.events import wait_for
+from lo_behave_common_steps.paths import resolve_path
+from lo_behave_common_steps import odf, convert
+from lo_behave_common_steps.idle import wait_until_idle
+from lo_behave_common_steps.benchmark import drop_caches, report_samples, report_benchmark
 
 
 @step(u'Start {app} via {type:w} with {component:w} parameter')
@@ -24,16 +31,12 @@ def start_app_component_via_command(context, app, component, type):
 
 @then(u'{component:w} document named like "{name}" is displayed')
 def document_is_displayed(context, component, name):
-    for attempt in xrange(0, 10):
-        try:
-            current_window = context.app.get_current_window()
-            window_title = current_window.name.decode('utf-8')
-            assert component in window_title and name in window_title
-            return
-        except AssertionError:
-            sleep(1)
-            continue
-    raise AssertionError("App window with expected title not found.")
+    def title_matches(window):
+        window_title = window.name.decode('utf-8')
+        return component in window_title and name in window_title
+
+    if not context.app.windows.wait_for_window(predicate=title_matches, timeout=10):
+        raise AssertionError("App window with expected title not found.")
 
 
 @step(u'Select "{menu}" menu')
@@ -65,35 +68,94 @@ def set_root_location(context, dialog):
 
 @step(u'In Open dialog select "{name}" from "{path}"')
 def select_file_in_dialog(context, name, path):
+    type_path_to_open_dialog(context, os.path.join(resolve_path(path), name))
+    keyCombo('<enter>')
+
+
+def type_path_to_open_dialog(context, full_path):
     # click search button
     context.app.dialog.findChildren(lambda x: x.roleName == 'toggle button' and x.showing)[0].click()
     set_root_location(context, context.app.dialog)
-
-    full_path = os.path.join(path, name)
     typeText(full_path)
+
+
+def open_via_menu(context, full_path, timeout=120):
+    """
+    Open document through File -> Open dialog, returns seconds from confirmation
+    of the dialog to the document window becoming active
+    """
+    name = os.path.basename(full_path)
+    select_menuitem(context, "File -> Open...")
+    context.app.dialog = context.app.windows.wait_for_window(name='Open', timeout=10)
+    assert context.app.dialog, "Open dialog was not displayed"
+    type_path_to_open_dialog(context, full_path)
+    start = time()
     keyCombo('<enter>')
+    window = context.app.windows.wait_for_window(
+        predicate=lambda x: x.roleName == 'frame' and name in x.name.decode('utf-8'), timeout=timeout)
+    assert window, "%s was not opened" % name
+    return time() - start
+
+
+def restart_soffice(context):
+    """
+    Start new soffice (with parameters of the last start) and wait for its
+    window. Returns True if page cache was dropped in between.
+    """
+    context.app.kill_session()
+    assert wait_for(lambda: not context.app.isRunning(), timeout=30), "soffice cannot be stopped"
+    dropped = drop_caches()
+    context.app.startViaCommand()
+    assert context.app.windows.wait_for_window(predicate=lambda x: x.roleName == 'frame', timeout=60), \
+        "soffice window was not displayed"
+    return dropped
+
+
+@step(u'Open "{name}" from "{path}" via menu "{repeat}" times in {session:w} session')
+def open_file_benchmark(context, name, path, repeat, session):
+    """
+    Warm session keeps soffice running (document is closed after each open),
+    cold session starts new soffice (and drops page cache when permitted) before each open
+    """
+    assert session in ['warm', 'cold'], "Session is warm or cold, not %s" % session
+    full_path = os.path.join(resolve_path(path), name)
+    samples = []
+    dropped = True
+    for run in xrange(int(repeat)):
+        if session == 'cold':
+            dropped = restart_soffice(context) and dropped
+        samples.append(open_via_menu(context, full_path))
+        keyCombo('<Control>w')
+        assert context.app.windows.wait_for_window(
+            predicate=lambda x: name not in x.name.decode('utf-8'), timeout=30), "%s was not closed" % name
+    context.open_samples = samples
+    if session == 'cold' and not dropped:
+        # not running as root, files were read from page cache
+        session = 'cold, page cache kept'
+    report_samples(context, u"Open %s via menu (%s session)" % (name, session), samples)
 
 
 @step(u'In dialog fill out path "{path}", name "{name}" and confirm')
 def file_save_to_path(context, path, name):
 
-    full_path = os.path.join(path, name)
+    full_path = os.path.join(resolve_path(path), name)
+    context.last_saved_path = full_path
     context.app.dialog = context.app.get_current_window()
     context.app.dialog.findChildren(lambda x: x.roleName == 'text')[0].set_text_contents(full_path)
     context.app.dialog.findChildren(lambda x: x.roleName == 'text')[0].grab_focus()
     keyCombo('<Enter>')
-    sleep(1)
+    wait_until_idle(context.app, replaces=1)
 
 
 @step(u'In open dialog fill out path "{path}", name "{name}" and confirm')
 def file_open_on_path(context, path, name):
 
-    full_path = os.path.join(path, name)
+    full_path = os.path.join(resolve_path(path), name)
     context.app.dialog = context.app.get_current_window()
     context.app.dialog.childLabelled('Location:').set_text_contents(full_path)
     context.app.dialog.childLabelled('Location:').grab_focus()
     keyCombo('<Enter>')
-    sleep(1)
+    wait_until_idle(context.app, replaces=1)
 
 
 @step(u'In Rename dialog set new name to "{new_name}"')
@@ -121,58 +183,59 @@ def click_button_in_dialog_window(context, button):
 
 @step(u'Check file "{name}" in "{path}" exists')
 def file_exists(context, name, path):
-    for attempt in xrange(0, 10):
-        try:
-            full_path = os.path.join(path, name)
-            assert os.path.isfile(full_path)
-            return
-        except AssertionError:
-            sleep(1)
-            continue
-    raise AssertionError("%s file in %s not found." % (name, path))
+    full_path = os.path.join(resolve_path(path), name)
+    if not wait_for(lambda: os.path.isfile(full_path), timeout=10, poll=0.1):
+        raise AssertionError("%s file in %s not found." % (name, path))
+
+
+def saved_file(name, path):
+    """
+    Returns full path of saved document which can be read without GUI
+    """
+    full_path = os.path.join(resolve_path(path), name)
+    file_exists(None, name, path)
+    odf.assert_readable(full_path)
+    return full_path
+
+
+@then(u'File "{name}" in "{path}" has "{text}" in cell "{address}"')
+def saved_file_has_cell_text(context, name, path, text, address):
+    found = odf.cell_text(saved_file(name, path), address)
+    assert found == text, "Text in cell %s of %s is: \"%s\", should be: \"%s\"" % (address, name, found, text)
+
+
+@then(u'File "{name}" in "{path}" has paragraph "{text}"')
+def saved_file_has_paragraph(context, name, path, text):
+    found = odf.paragraphs(saved_file(name, path))
+    assert text in found, "Paragraph \"%s\" not found in %s, paragraphs are: %s" % (text, name, found)
+
+
+@then(u'File "{name}" in "{path}" has text "{text}" on slide "{number}"')
+def saved_file_has_slide_text(context, name, path, text, number):
+    found = odf.slide_texts(saved_file(name, path), int(number))
+    assert text in found, "Text \"%s\" not found on slide %s of %s, texts are: %s" % (text, number, name, found)
 
 
 @then(u'Dialog window named "{dialog_name}" is displayed')
 def dialog_window_is_displayed(context, dialog_name):
-    
-    for attempt in xrange(0, 10):
-        try:
-            dialog_window = context.app.get_current_window()
-            assert dialog_window.name == dialog_name
-            context.app.dialog = dialog_window
-            return
-        except AssertionError:
-            sleep(1)
-            continue
-    raise AssertionError("Dialog window with expected title not found.")
+    dialog_window = context.app.windows.wait_for_window(name=dialog_name, timeout=10)
+    if not dialog_window:
+        raise AssertionError("Dialog window with expected title not found.")
+    context.app.dialog = dialog_window
 
 
 @then(u'Dialog window named like "{dialog_name}" is displayed')
 def dialog_window_like_is_displayed(context, dialog_name):
-
-    for attempt in xrange(0, 10):
-        try:
-            dialog_window = context.app.get_current_window()
-            assert dialog_name in dialog_window.name
-            context.app.dialog = dialog_window
-            return
-        except AssertionError:
-            sleep(1)
-            continue
-    raise AssertionError("Dialog window with expected title not found.")
+    dialog_window = context.app.windows.wait_for_window(like=dialog_name, timeout=10)
+    if not dialog_window:
+        raise AssertionError("Dialog window with expected title not found.")
+    context.app.dialog = dialog_window
 
 
 @step(u'Window named "{window_name}" is displayed')
 def window_is_displayed(context, window_name):
-    for attempt in xrange(0, 15):
-        try:
-            current_window = context.app.get_current_window()
-            assert current_window.name == window_name
-            return
-        except AssertionError:
-            sleep(1)
-            continue
-    raise AssertionError("Window with expected title not found.")
+    if not context.app.windows.wait_for_window(name=window_name, timeout=15):
+        raise AssertionError("Window with expected title not found.")
 
 
 @step(u'Insert example data into {component} document')
@@ -224,7 +287,7 @@ def document_contains_table(context, table_name):
 def save_and_close_document(context, document_name, document_path, extension):
 
     select_menuitem(context, "File -> Save As...")
-    sleep(1)
+    wait_until_idle(context.app, replaces=1)
 
     context.dialog = context.app.get_current_window()
     combo_box = context.dialog.findChildren(lambda x: x.name == 'All Formats' and x.roleName == 'combo box')[0]
@@ -235,5 +298,38 @@ def save_and_close_document(context, document_name, document_path, extension):
 
     # click dialog if you are sure that you want use extension format
     context.app.get_current_window().findChildren(lambda x: x.roleName == 'push button')[-1].click()
-    sleep(1)
+    wait_until_idle(context.app, replaces=1)
     select_menuitem(context, "File -> Exit LibreOffice")
+
+
+@step(u'Convert "{copies}" copies of documents in "{path}" to all formats headless')
+def convert_documents_headless(context, copies, path):
+    """
+    Every document is converted to formats of convert.TARGETS by headless
+    soffice workers and read back, copies make the matrix bigger
+    """
+    directory = resolve_path(path)
+    documents = sorted([x for x in os.listdir(directory) if os.path.splitext(x)[1].lower() in convert.TARGETS])
+    sources = [os.path.join(directory, x) for x in documents]
+    if int(copies) > 1:
+        copies_dir = os.path.join(resolve_path('{sandbox}'), 'conversion_sources')
+        if not os.path.isdir(copies_dir):
+            os.makedirs(copies_dir)
+        sources = []
+        for number in xrange(int(copies)):
+            for document in documents:
+                stem, extension = os.path.splitext(document)
+                sources.append(os.path.join(copies_dir, '%s-%d%s' % (stem, number, extension)))
+                shutil.copy(os.path.join(directory, document), sources[-1])
+
+    start = time()
+    context.conversions, per_second = convert.convert_matrix(convert.conversion_matrix(sources))
+    report_benchmark(context, u"Headless conversion of %d documents" % len(context.conversions), time() - start,
+                     documents_per_second=round(per_second, 2))
+
+
+@then(u'All converted documents keep their content')
+def converted_documents_keep_content(context):
+    failed = [x for x in context.conversions if x.problems]
+    assert not failed, "Conversions lost content:\n%s" % u"\n".join(
+        [u"%s -> %s: %s" % (os.path.basename(x.source), x.target, u"; ".join(x.problems)) for x in failed])
@@ -1,6 +1,6 @@
 # -*- coding: UTF-8 -*-
 
-from behave import step
+from behave import step, given
 
 from dogtail import predicate
 from dogtail.tree import root
@@ -9,6 +9,9 @@ from behave_common_steps.appmenu import *
 from behave_common_steps.dialogs import *
 from dogtail.rawinput import keyCombo, typeText, pressKey
 from general import window_is_displayed, select_menuitem, select_file_in_dialog, file_save_to_path, start_app_component_via_command
+from lo_behave_common_steps.text import insert_text
+from lo_behave_common_steps.idle import wait_until_idle
+from lo_behave_common_steps.events import wait_for
 
 
 @step(u'Change Impress presentation layout to {layout_name}')
@@ -111,15 +114,31 @@ def insert_text_to_slide(context, number_of_slide, text):
     
     # find paragraph to write and write
     frame = context.app.get_current_window().findChildren(lambda x: x.roleName == 'document presentation')[0]
-    frame.findChildren(lambda x: x.name == 'Paragraph 0')[0].click()
-    
-    typeText(text)
+    paragraph = frame.findChildren(lambda x: x.name == 'Paragraph 0')[0]
+    paragraph.click()
+
+    insert_text(paragraph, text)
+
+
+@given(u'Slide "{number_of_slide}" contains text "{text}"')
+def slide_contains_text(context, number_of_slide, text):
+    bridge = context.app.uno()
+    if bridge:
+        bridge.set_slide_text(int(number_of_slide), text)
+    else:
+        slides = context.app.get_current_window().child(name='Slides View', roleName='document frame')
+        # slide sorter updates childCount asynchronously
+        for x in xrange(int(number_of_slide) - slides.childCount):
+            before = slides.childCount
+            select_menuitem(context, "Insert -> Slide")
+            assert wait_for(lambda: slides.childCount > before, timeout=10), "Slide was not inserted"
+        insert_text_to_slide(context, number_of_slide, text)
 
 
 @then(u'Slide "{number_of_slide}" include text "{text}"')
 def slide_include_text(context, number_of_slide, text):
 
-    sleep(5)
+    wait_until_idle(context.app, replaces=5)
     current_window = context.app.get_current_window()
     current_window.child(name='Slides View', roleName='document frame')[int(number_of_slide)-1].click()
 
@@ -9,6 +9,9 @@ from behave_common_steps.appmenu import *
 from behave_common_steps.dialogs import *
 from dogtail.rawinput import keyCombo, typeText, pressKey
 from general import click_button_in_dialog_window
+from lo_behave_common_steps.text import insert_text
+from lo_behave_common_steps.selectors import select, select_one
+from lo_behave_common_steps.idle import wait_until_idle
 
 
 @step(u'Paragraph ends with "{character}" character')
@@ -27,7 +30,7 @@ def search_and_replace_text(context):
 def type_text_to_paragraph(context, text):
     current_window = context.app.get_current_window()
     context.paragraph = current_window.child(roleName='paragraph')
-    context.paragraph.typeText(text)
+    insert_text(context.paragraph, text)
 
     assert context.paragraph.text == text, \
         "Incorrect text in paragrap, expected '%s' but was '%s'" % (text, context.paragraph.text)
@@ -46,16 +49,14 @@ def type_text_to_paragraph(context, replaced_text, replacement):
     keyCombo('<Control>h')
     dialog = context.app.get_current_window()
     # Search Field
-    dialog.findChildren(lambda x: x.name == 'Search For' and x.roleName=='panel')[0].\
-        child(roleName='text').typeText(replaced_text)
-    dialog.findChildren(lambda x: x.roleName == 'push button' and x.name == 'Find All' and x.showing)[0].click()
+    insert_text(select_one(dialog, 'panel[name="Search For"] text'), replaced_text)
+    select_one(dialog, 'push-button[name="Find All"]:showing').click()
     # Replace Field
-    dialog.findChildren(lambda x: x.name == 'Replace With' and x.roleName=='panel')[0].\
-        child(roleName='text').typeText(replacement)
-    dialog.findChildren(lambda x: x.roleName == 'push button' and x.name == 'Replace All' and x.showing)[0].click()
+    insert_text(select_one(dialog, 'panel[name="Replace With"] text'), replacement)
+    select_one(dialog, 'push-button[name="Replace All"]:showing').click()
 
     # this is used for wait of alert - it takes some time to render and not in all situation its gets showed instantly
-    sleep(1)
+    wait_until_idle(context.app, replaces=1)
     alert_dialog = context.app.get_current_window()
     click_button_in_dialog_window(context, "OK")
 
@@ -63,7 +64,7 @@ def type_text_to_paragraph(context, replaced_text, replacement):
     assert context.paragraph.text == replacement, "Incorrect text in paragraph, expected '%s' but was '%s'" % (
         replacement, context.paragraph.text)
 
-    dialog.findChildren(lambda x: x.roleName == 'push button' and x.name == 'Close' and x.showing)[0].click()
+    select_one(dialog, 'push-button[name=Close]:showing').click()
 
 
 @then(u'Undo replace text with ctrl+z')
@@ -80,11 +81,9 @@ def undo_replace_text_with_shortcut(context):
 @step(u'Insert table')
 def insert_table(context):
     keyCombo('<Control><F12>')
-    context.app.get_current_window().findChildren(
-        lambda x: x.roleName == 'push button' and x.name == 'Insert' and x.showing)[0].click()
+    select_one(context.app.get_current_window(), 'push-button[name=Insert]:showing').click()
 
-    assert len(context.app.get_current_window().findChildren(
-        lambda x: x.showing and x.roleName == 'table')) != 0, "In paragraph should be at least one table"
+    assert len(select(context.app.get_current_window(), 'table:showing')) != 0, "In paragraph should be at least one table"
 
 
 @step(u'Select all text and delete')
@@ -115,7 +114,8 @@ def panels_displayed(context, name1, name2):
 
 @step(u'Insert "{formula}" formula to panel with name "{panelname}"')
 def insert_formula_to_panel(context, formula, panelname):
-    context.panel_commands.child(roleName='paragraph').typeText(formula)
+    context.panel_commands = select_one(context.window, 'panel[name="%s"]' % panelname)
+    insert_text(select_one(context.panel_commands, 'paragraph'), formula)
     context.window.child(roleName='paragraph').click()
 
 
@@ -136,7 +136,7 @@ def formula_in_opened_document(context, formula):
 @step(u'Insert text "{text}" to document')
 def insert_text_to_document(context, text):
     context.window = context.app.get_current_window()
-    context.window.child(roleName='document text').child(roleName='paragraph').typeText(text)
+    insert_text(context.window.child(roleName='document text').child(roleName='paragraph'), text)
 
 
 @then(u'Text "{text}" is in document')
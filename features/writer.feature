@@ -40,11 +40,11 @@ Feature: LibreOffice Writer tests
     Then Formula panels with names "Elements" and "Commands" for edit are displayed
     * Insert "lllint from{1} to{x} (1 over sum from {k > j} (d_(j)+arccot(nroot{32 }X^{11})))+1" formula to panel with name "Commands"
     * Select "File -> Save As..." menu
-    Then In dialog fill out path "/tmp/", name "formula" and confirm
+    Then In dialog fill out path "{sandbox}/", name "formula" and confirm
     * Select "File -> Exit LibreOffice" menu
     * Start soffice via command with Writer parameter
     * Select "File -> Open..." menu
-    * In open dialog fill out path "/tmp", name "formula.odt" and confirm
+    * In open dialog fill out path "{sandbox}", name "formula.odt" and confirm
     Then Writer document named like "formula" is displayed
     Then Formula "lllint from{1} to{x} (1 over sum from {k > j} (d_(j)+arccot(nroot{32 }X^{11})))+1" is saved in document
  
@@ -70,12 +70,12 @@ Feature: LibreOffice Writer tests
     * Start soffice via command with Writer parameter
     Then Writer document named like "Untitled" is displayed
     * Insert text "kiitos" to document
-    * Save document and close "tmp" with path "/tmp/test_files" as extension "(.doc)"
+    * Save document and close "tmp" with path "{sandbox}/test_files" as extension "(.doc)"
     Then soffice shouldn't be running anymore
     * Start soffice via command with Writer parameter
     * Select "File -> Open..." menu
     Then Dialog window named "Open" is displayed
-    * In Open dialog select "tmp.doc" from "/tmp/test_files"
+    * In Open dialog select "tmp.doc" from "{sandbox}/test_files"
     Then Writer document named like "tmp" is displayed
     Then Text "kiitos" is in document
 
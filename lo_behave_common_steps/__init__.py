@@ -1,6 +1,10 @@
 # -*- coding: UTF-8 -*-
+import os
+from signal import SIGKILL
 from subprocess import Popen, PIPE
+from time import time
 from iniparse import ConfigParser
+import pyatspi
 from dogtail.tree import root, SearchError
 
 from behave_common_steps import App
@@ -9,6 +13,16 @@ from behave_common_steps.appmenu import *
 from behave_common_steps.dialogs import *
 from dogtail.utils import run
 from dogtail.tree import root, SearchError
+from lo_behave_common_steps.windows import WindowTracker
+from lo_behave_common_steps.cache import AccessibleCache
+from lo_behave_common_steps.profile import user_installation_url
+from lo_behave_common_steps.bridge import UnoBridge, bridge_available
+
+# Title of the frame left when all documents are closed
+START_CENTER_NAMES = ['LibreOffice', 'Start Center']
+# Buttons closing a dialog without side effects, in order of preference
+CLOSE_BUTTONS = ["Don't Save", 'Cancel', 'Close']
+
 
 class LOApp(App):
     """
@@ -16,7 +30,7 @@ class LOApp(App):
     """
     def __init__(self, appName, shortcut='<Control><Q>', desktopFileName=None,
                  timeout=5, a11yAppName=None, forceKill=True, parameters='',
-                 recordVideo=False, processName=None):
+                 recordVideo=False, processName=None, reuseSession=False, unoBridge=False):
         """
         ...
         """
@@ -28,28 +42,88 @@ class LOApp(App):
         else:
             self.processName = processName
 
+        # Stack of live soffice windows fed by AT-SPI events
+        self.windows = WindowTracker(a11yAppName or appName)
+        self.windows.start()
+
+        # Resolved accessibles, invalidated by AT-SPI events
+        self.cache = AccessibleCache(a11yAppName or appName)
+        self.cache.start()
+
+        # User profile directory passed via -env:UserInstallation (default profile if None)
+        self.userInstallation = None
+
+        # soffice started via command accepts UNO connections (if pyuno is installed)
+        self.bridge = None
+        if unoBridge and bridge_available():
+            self.bridge = UnoBridge()
+
+        # Keep soffice running between scenarios (see reset_session)
+        self.reuseSession = reuseSession
+        self.coldStarts = []
+        self.warmStarts = []
+        self.resets = []
+
+
+    def command_line(self):
+        """
+        Returns command soffice is started with, dogtail run() splits it on
+        whitespace (no shell, quotes would be passed to soffice as they are)
+        """
+        command = "%s %s" % (self.appCommand, self.parameters)
+        if self.userInstallation:
+            command += " -env:UserInstallation=%s" % user_installation_url(self.userInstallation)
+        if self.bridge:
+            command += " %s" % self.bridge.accept_parameter()
+        return command
 
     def startViaCommand(self):
         """
         Start the app via command
+        (in reuseSession mode the command is passed to the running soffice)
         """
-        if self.forceKill and self.isRunning():
+        warm = self.reuseSession and self.isRunning()
+        if self.forceKill and not warm and self.isRunning():
             self.kill()
             assert not self.isRunning(), "Application cannot be stopped"
 
-        command = "%s %s" % (self.appCommand, self.parameters)
-        self.pid = run(command, timeout=10)
+        start = time()
+        command = self.command_line()
+        pid = run(command, timeout=10)
+        if not warm:
+            self.pid = pid
 
         assert self.isRunning(), "Application failed to start"
+        (self.warmStarts if warm else self.coldStarts).append(time() - start)
+        if self.bridge and not warm:
+            assert self.bridge.accept_parameter() in command.split(), \
+                "soffice does not get %s as one argument" % self.bridge.accept_parameter()
+            self.bridge.disconnect()
+            self.bridge.connect()
+        self.windows.refresh()
         return root.application(self.a11yAppName)
 
+    def startWithDocument(self, path):
+        """
+        Start the app via command opening document at path
+        (in reuseSession mode the document is opened by the running soffice)
+        """
+        # dogtail run() splits the command on whitespace, quotes would reach soffice
+        assert len(path.split()) == 1, "Cannot pass path with whitespace to soffice: %s" % path
+        parameters = self.parameters
+        self.parameters = "%s %s" % (parameters, path)
+        try:
+            return self.startViaCommand()
+        finally:
+            self.parameters = parameters
+
     def startViaMenu(self, throughCategories=False):  # pylint: disable=W0613
         """
         Start the app via Gnome Shell menu
         """
         desktopConfig = self.parseDesktopFile()
 
-        if self.forceKill and self.isRunning():
+        if self.forceKill and not self.reuseSession and self.isRunning():
             self.kill()
             assert wait_until(lambda x: not x.isRunning(), self, timeout=30),\
                 "Application cannot be stopped"
@@ -101,10 +175,103 @@ class LOApp(App):
                               self, timeout=10)
         except:
             # send SIGKILL if sigterm didn't work
-            Popen("killall -9 " + self.processName + " > /dev/null",
-                  shell=True).wait()
+            self.kill_session()
         self.pid = None
+        self.windows.reset()
+        self.cache.clear()
+        if self.bridge:
+            self.bridge.disconnect()
+
+    def session_pids(self):
+        """
+        Returns pids of soffice.bin processes running on our display
+        (other sessions may run their own soffice in parallel)
+        """
+        display = os.environ.get('DISPLAY')
+        pids = []
+        for pid in os.listdir('/proc'):
+            if not pid.isdigit():
+                continue
+            try:
+                if open('/proc/%s/comm' % pid).read().strip() != 'soffice.bin':
+                    continue
+                environ = open('/proc/%s/environ' % pid).read().split('\0')
+            except IOError:
+                continue
+            if display is None or 'DISPLAY=%s' % display in environ:
+                pids.append(int(pid))
+        return pids
+
+    def isRunning(self):
+        """
+        Is soffice running on our display
+        """
+        return bool(self.session_pids())
+
+    def kill_session(self):
+        """
+        Send SIGKILL to all soffice.bin processes on our display
+        """
+        for pid in self.session_pids():
+            try:
+                os.kill(pid, SIGKILL)
+            except OSError:
+                pass
+        self.windows.reset()
+        self.cache.clear()
+        if self.bridge:
+            self.bridge.disconnect()
+
+
+    def reset_session(self, attempts=10):
+        """
+        Close all documents and dialogs through the a11y tree, so the running
+        soffice can be reused by next scenario.
+        Returns True when only Start Center is left.
+        """
+        start = time()
+        for attempt in xrange(0, attempts):
+            self.windows.refresh()
+            windows = [x for x in self.windows.stack if x.name not in START_CENTER_NAMES]
+            if not windows:
+                self.resets.append(time() - start)
+                return True
+
+            window = windows[-1]
+            try:
+                if window.roleName == 'frame':
+                    window.menu('Window').menuItem('Close Window').doActionNamed('click')
+                else:
+                    buttons = window.findChildren(lambda x: x.roleName == 'push button' and x.name in CLOSE_BUTTONS)
+                    if not buttons:
+                        return False
+                    buttons.sort(key=lambda x: CLOSE_BUTTONS.index(x.name))
+                    buttons[0].click()
+            except (SearchError, LookupError):
+                return False
 
+            self.windows.wait_for_window(
+                predicate=lambda x: x != window or x.name in START_CENTER_NAMES, timeout=5)
+        return False
+
+    def session_report(self):
+        """
+        Returns summary of cold starts avoided by reuseSession mode
+        """
+        if not self.coldStarts:
+            return "Cold starts: 0, avoided: %d" % len(self.warmStarts)
+        cold = sum(self.coldStarts) / len(self.coldStarts)
+        saved = cold * len(self.warmStarts) - sum(self.warmStarts) - sum(self.resets)
+        return "Cold starts: %d (%.1fs on average), avoided: %d, saved: %.1fs" % (
+            len(self.coldStarts), cold, len(self.warmStarts), saved)
+
+    def uno(self):
+        """
+        Returns connected UnoBridge or None if soffice does not accept UNO connections
+        """
+        if self.bridge is None or not self.isRunning():
+            return None
+        return self.bridge.connect()
 
     def get_current_window(self, dialog=False):
         """
@@ -115,7 +282,22 @@ class LOApp(App):
         else:
             role = 'frame'
 
-        soffice = root.application('soffice')
-        # all_frames = [x for x in soffice.findChildren(lambda x: x.roleName == role, recursive=False)]
-        all_frames = [x for x in soffice.findChildren(lambda x: True, recursive=False)]
+        def resolve():
+            soffice = root.application('soffice')
+            # all_frames = [x for x in soffice.findChildren(lambda x: x.roleName == role, recursive=False)]
+            return [x for x in soffice.findChildren(lambda x: True, recursive=False)]
+
+        misses = self.cache.misses
+        all_frames = self.cache.lookup(None, (), resolve)
+        # a missed window:activate event must not leave a stale window cached
+        if self.cache.misses == misses and not all_frames[-1].getState().contains(pyatspi.STATE_ACTIVE):
+            self.cache.invalidate(None, ())
+            all_frames = self.cache.lookup(None, (), resolve)
         return all_frames[-1]
+
+    def child(self, node, roleName=None, name=None):
+        """
+        Cached equivalent of node.child(roleName=roleName, name=name)
+        """
+        return self.cache.lookup(node, (roleName, name),
+                                 lambda: node.child(roleName=roleName, name=name))
@@ -0,0 +1,71 @@
+# -*- coding: UTF-8 -*-
+import subprocess
+
+
+def rss_bytes(pids):
+    """
+    Returns resident memory of processes (sum of VmRSS)
+    """
+    total = 0
+    for pid in pids:
+        try:
+            for line in open('/proc/%d/status' % pid):
+                if line.startswith('VmRSS:'):
+                    total += int(line.split()[1]) * 1024
+                    break
+        except IOError:
+            continue
+    return total
+
+
+def percentile(values, share):
+    """
+    Returns percentile (share like 0.95) of values, interpolated between
+    the closest ranks
+    """
+    values = sorted(values)
+    if not values:
+        return None
+    rank = (len(values) - 1) * share
+    lower = int(rank)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (rank - lower)
+
+
+def drop_caches():
+    """
+    Drop page cache of the system (cold start), returns False without permission
+    """
+    subprocess.call(['sync'])
+    try:
+        with open('/proc/sys/vm/drop_caches', 'w') as caches:
+            caches.write('3\n')
+    except IOError:
+        return False
+    return True
+
+
+def report_benchmark(context, name, seconds, **metrics):
+    """
+    Record benchmark to profiler history (if profiling is on) and embed it
+    to the report
+    """
+    if getattr(context, 'profiler', None):
+        context.profiler.record_benchmark(name, seconds, **metrics)
+    if hasattr(context, "embed"):
+        context.embed('text/plain', u"%s: %.3fs%s" % (name, seconds, u''.join(
+            [u", %s %s" % (key, value) for key, value in sorted(metrics.items())])))
+
+
+def report_samples(context, name, samples):
+    """
+    Record every sample of repeated benchmark to profiler history (medians
+    are compared with previous runs) and embed percentiles to the report
+    """
+    if getattr(context, 'profiler', None):
+        for seconds in samples:
+            context.profiler.record_benchmark(name, seconds)
+    if hasattr(context, "embed"):
+        context.embed('text/plain', u"%s: %d runs, p50 %.3fs, p90 %.3fs, p95 %.3fs, max %.3fs" % (
+            name, len(samples), percentile(samples, 0.5), percentile(samples, 0.9),
+            percentile(samples, 0.95), max(samples)))
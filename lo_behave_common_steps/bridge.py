@@ -0,0 +1,176 @@
+# -*- coding: UTF-8 -*-
+import os
+
+from lo_behave_common_steps.calc import cell_name, parse_cell
+from lo_behave_common_steps.events import wait_for
+
+try:
+    import uno
+    from com.sun.star.connection import NoConnectException
+except ImportError:
+    uno = None
+
+SPREADSHEET = 'com.sun.star.sheet.SpreadsheetDocument'
+PRESENTATION = 'com.sun.star.presentation.PresentationDocument'
+DATABASE = 'com.sun.star.sdb.OfficeDatabaseDocument'
+
+
+def bridge_available():
+    """
+    Returns True if python-uno (libreoffice-pyuno) is installed
+    """
+    return uno is not None
+
+
+class UnoBridge(object):
+    """
+    UNO connection to soffice started with accept_parameter(), used to set
+    up documents directly through the API (no GUI interaction)
+    """
+    def __init__(self, pipe=None):
+        self.pipe = pipe or 'lo-behave-%d' % os.getpid()
+        self.context = None
+        self.desktop = None
+
+    def accept_parameter(self):
+        return "--accept=pipe,name=%s;urp;StarOffice.ComponentContext" % self.pipe
+
+    def _resolve(self):
+        local = uno.getComponentContext()
+        resolver = local.ServiceManager.createInstanceWithContext('com.sun.star.bridge.UnoUrlResolver', local)
+        try:
+            self.context = resolver.resolve('uno:pipe,name=%s;urp;StarOffice.ComponentContext' % self.pipe)
+        except NoConnectException:
+            return False
+        self.desktop = self.context.ServiceManager.createInstanceWithContext(
+            'com.sun.star.frame.Desktop', self.context)
+        return True
+
+    def connect(self, timeout=30):
+        """
+        Connect to soffice (it accepts connections only when it is fully started)
+        """
+        if self.desktop is not None:
+            try:
+                self.desktop.getCurrentComponent()
+            except Exception:
+                # soffice was restarted
+                self.disconnect()
+        if self.desktop is None:
+            assert wait_for(self._resolve, timeout=timeout, poll=0.2), \
+                "Unable to connect to soffice via pipe %s" % self.pipe
+        return self
+
+    def disconnect(self):
+        """
+        Forget the connection (e.g. soffice was killed)
+        """
+        self.context = None
+        self.desktop = None
+
+    def document(self, service):
+        """
+        Returns current document if it supports service, otherwise first such
+        open document
+        """
+        current = self.connect().desktop.getCurrentComponent()
+        if current is not None and current.supportsService(service):
+            return current
+        components = self.desktop.getComponents().createEnumeration()
+        while components.hasMoreElements():
+            component = components.nextElement()
+            if component.supportsService(service):
+                return component
+        raise AssertionError("No open document supports %s" % service)
+
+    def add_sheet(self, name):
+        """
+        Append sheet to current spreadsheet
+        """
+        sheets = self.document(SPREADSHEET).getSheets()
+        if not sheets.hasByName(name):
+            sheets.insertNewByName(name, sheets.getCount())
+
+    def set_cell(self, sheet, address, text):
+        """
+        Put number or text to cell of sheet of current spreadsheet
+        """
+        row, col = parse_cell(address)
+        cell = self.document(SPREADSHEET).getSheets().getByName(sheet).getCellRangeByName(cell_name(row, col))
+        try:
+            cell.setValue(float(text))
+        except ValueError:
+            cell.setString(text)
+
+    def set_slide_text(self, number, text):
+        """
+        Set text of the first text shape (title) of slide number (1-based),
+        missing slides are appended
+        """
+        document = self.document(PRESENTATION)
+        pages = document.getDrawPages()
+        while pages.getCount() < number:
+            pages.insertNewByIndex(pages.getCount() - 1)
+        page = pages.getByIndex(number - 1)
+        for index in xrange(page.getCount()):
+            shape = page.getByIndex(index)
+            if shape.supportsService('com.sun.star.drawing.Text'):
+                shape.setString(text)
+                return
+        shape = document.createInstance('com.sun.star.drawing.TextShape')
+        page.add(shape)
+        shape.setSize(uno.createUnoStruct('com.sun.star.awt.Size', 20000, 3000))
+        shape.setString(text)
+
+    def execute_sql(self, statements):
+        """
+        Execute SQL statements in the open database document and store it
+        """
+        document = self.document(DATABASE)
+        connection = document.DataSource.getConnection('', '')
+        try:
+            statement = connection.createStatement()
+            for sql in statements:
+                statement.execute(sql)
+            connection.getTables().refresh()
+        finally:
+            connection.close()
+        document.DataSource.flush()
+        document.store()
+
+    def insert_rows(self, table, columns, rows, batch=1000):
+        """
+        Insert rows (iterable of lists of texts) to table of the open database
+        document in batches of one prepared statement and store it,
+        returns number of inserted rows
+        """
+        document = self.document(DATABASE)
+        connection = document.DataSource.getConnection('', '')
+        count = 0
+        try:
+            connection.setAutoCommit(False)
+            statement = connection.prepareStatement('INSERT INTO "%s" (%s) VALUES (%s)' % (
+                table, ', '.join(['"%s"' % x for x in columns]), ', '.join(['?'] * len(columns))))
+            batched = hasattr(statement, 'addBatch')
+            pending = 0
+            for row in rows:
+                for index, value in enumerate(row):
+                    statement.setString(index + 1, value)
+                if not batched:
+                    statement.executeUpdate()
+                    count += 1
+                    continue
+                statement.addBatch()
+                pending += 1
+                count += 1
+                if pending == batch:
+                    statement.executeBatch()
+                    pending = 0
+            if pending:
+                statement.executeBatch()
+            connection.commit()
+        finally:
+            connection.close()
+        document.DataSource.flush()
+        document.store()
+        return count
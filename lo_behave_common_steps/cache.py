@@ -0,0 +1,116 @@
+# -*- coding: UTF-8 -*-
+from lo_behave_common_steps.events import register, deregister, pump_events
+
+
+class AccessibleCache(object):
+    """
+    Cache of resolved accessibles keyed by (application, window, path).
+
+    window is None for the list of top-level windows of the application,
+    path is a tuple describing the lookup below window (e.g. role and name).
+    An entry is dropped when AT-SPI reports a change of the resolved
+    accessible or of one of its ancestors up to window.
+    """
+    EVENTS = ('object:children-changed', 'object:state-changed:defunct',
+              'object:property-change:accessible-name',
+              'window:create', 'window:destroy')
+
+    # Longest chain of ancestors remembered for an entry
+    DEPTH = 50
+
+    def __init__(self, appName):
+        self.appName = appName
+        # key: (accessible, accessibles whose change invalidates it)
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.listening = False
+
+    def start(self):
+        """
+        Start listening to events invalidating the cache
+        """
+        if not self.listening:
+            register(self._on_event, *self.EVENTS)
+            self.listening = True
+
+    def stop(self):
+        """
+        Stop listening to events and drop all entries
+        """
+        if self.listening:
+            deregister(self._on_event, *self.EVENTS)
+            self.listening = False
+        self.clear()
+
+    def clear(self):
+        """
+        Drop all entries
+        """
+        self.entries = {}
+
+    def _on_event(self, event):
+        try:
+            app = event.host_application
+            if app is None or app.name != self.appName:
+                return
+        except Exception:
+            return
+
+        source = event.source
+        if source == app or event.type.startswith('window:'):
+            # top-level windows were added or removed
+            self.clear()
+            return
+
+        # Only lookups going through the subtree of the source are dropped
+        for key in list(self.entries):
+            if source in self.entries[key][1]:
+                del self.entries[key]
+
+    def _chain(self, window, node):
+        """
+        Returns node and its ancestors up to window (the top-level windows
+        for the list of windows), any change of them invalidates the entry
+        """
+        if window is None:
+            return list(node)
+        chain = [node]
+        for x in xrange(self.DEPTH):
+            if chain[-1] == window:
+                break
+            parent = chain[-1].parent
+            if parent is None:
+                break
+            chain.append(parent)
+        return chain
+
+    def invalidate(self, window, path):
+        """
+        Drop entry of (window, path), e.g. when it does not match the state
+        of the application any longer
+        """
+        self.entries.pop((self.appName, window, path), None)
+
+    def lookup(self, window, path, resolve):
+        """
+        Returns cached accessible for (window, path), resolve() is called
+        to find it on a miss.
+        """
+        pump_events()
+        key = (self.appName, window, path)
+        if key in self.entries:
+            self.hits += 1
+            return self.entries[key][0]
+
+        self.misses += 1
+        node = resolve()
+        if self.listening:
+            self.entries[key] = (node, self._chain(window, node))
+        return node
+
+    def counters(self):
+        """
+        Returns (hits, misses) tuple
+        """
+        return self.hits, self.misses
@@ -0,0 +1,290 @@
+# -*- coding: UTF-8 -*-
+import re
+from collections import OrderedDict
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+CELL_RE = re.compile(r'^(?:Cell )?\$?([A-Za-z]+)\$?([0-9]+)$')
+
+
+def column_index(name):
+    """
+    Returns zero based index of column named like 'A', 'Z' or 'AA'
+    """
+    index = 0
+    for char in name.upper():
+        index = index * 26 + ord(char) - ord('A') + 1
+    return index - 1
+
+
+def column_name(index):
+    """
+    Returns name of column with zero based index (inverse of column_index)
+    """
+    name = ''
+    index += 1
+    while index:
+        index, rest = divmod(index - 1, 26)
+        name = chr(ord('A') + rest) + name
+    return name
+
+
+def cell_name(row, column):
+    """
+    Returns A1 notation of cell with zero based row and column
+    """
+    return "%s%d" % (column_name(column), row + 1)
+
+
+def parse_cell(address):
+    """
+    Returns zero based (row, column) of cell given like 'B2', '$B$2' or 'Cell B2'
+    """
+    match = CELL_RE.match(address.strip())
+    if not match or int(match.group(2)) < 1:
+        raise ValueError("'%s' is not a cell address" % address)
+    return int(match.group(2)) - 1, column_index(match.group(1))
+
+
+def parse_range(address):
+    """
+    Returns ((top, left), (bottom, right)) of range given like 'A1:D3'.
+    Single cell address is a range of one cell.
+    """
+    if ':' in address:
+        first, last = address.split(':', 1)
+    else:
+        first = last = address
+    (row1, col1), (row2, col2) = parse_cell(first), parse_cell(last)
+    return (min(row1, row2), min(col1, col2)), (max(row1, row2), max(col1, col2))
+
+
+def range_name(first, last):
+    """
+    Returns A1 notation of range between zero based (row, column) tuples
+    """
+    return "%s:%s" % (cell_name(*first), cell_name(*last))
+
+
+class CellAccessor(object):
+    """
+    Resolves cells of a Calc table by A1 address through AT-SPI Table
+    interface (getAccessibleAt), so children of the table are never
+    enumerated. Resolved cells are kept in a bounded LRU cache.
+    """
+    def __init__(self, table, size=4096):
+        self.table = table
+        self.size = size
+        self.cells = OrderedDict()
+        self._table = table.queryTable()
+        self._columns = None
+
+    @property
+    def columns(self):
+        """
+        Real number of columns of the table
+        """
+        if self._columns is None:
+            self._columns = self._table.nColumns
+        return self._columns
+
+    def at(self, row, column):
+        """
+        Returns cell accessible at zero based row and column
+        """
+        key = (row, column)
+        cell = self.cells.pop(key, None)
+        if cell is None:
+            cell = self._table.getAccessibleAt(row, column)
+            if len(self.cells) >= self.size:
+                self.cells.popitem(last=False)
+        self.cells[key] = cell
+        return cell
+
+    def cell(self, address):
+        """
+        Returns cell accessible for address like 'B2'
+        """
+        return self.at(*parse_cell(address))
+
+    def index(self, address):
+        """
+        Returns index of cell among children of the table
+        """
+        row, column = parse_cell(address)
+        return row * self.columns + column
+
+    def rows(self, address):
+        """
+        Returns cells of range like 'A1:D3' as a list of rows
+        """
+        (top, left), (bottom, right) = parse_range(address)
+        return [[self.at(row, column) for column in range(left, right + 1)]
+                for row in range(top, bottom + 1)]
+
+    def forget(self):
+        """
+        Drop all resolved cells (e.g. when they went defunct)
+        """
+        self.cells.clear()
+
+    def snapshot_range(self, address=None):
+        """
+        Returns RangeSnapshot of range like 'A1:D3' (whole table if None),
+        every cell is read once and not kept in the cache
+        """
+        if address is None:
+            address = range_name((0, 0), (self._table.nRows - 1, self.columns - 1))
+        (top, left), (bottom, right) = parse_range(address)
+        return RangeSnapshot(address, [[_text(self._table.getAccessibleAt(row, column).text)
+                                        for column in range(left, right + 1)]
+                                       for row in range(top, bottom + 1)])
+
+
+def _text(text):
+    if isinstance(text, str):
+        return text.decode('utf-8')
+    return text
+
+
+def to_number(text):
+    """
+    Returns float value of text or None if it is not a number
+    """
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return None
+
+
+def snapshot_cells(cells, columns, address='A1', attribute='text'):
+    """
+    Returns RangeSnapshot of cell accessibles listed row by row (e.g. cells of
+    a dialog table without Table interface), reading attribute of each once
+    """
+    texts = [_text(getattr(x, attribute)) for x in cells]
+    rows = [texts[x:x + columns] for x in range(0, len(texts), columns)]
+    (top, left), _ = parse_range(address)
+    if not rows:
+        return RangeSnapshot(None, [])
+    return RangeSnapshot(range_name((top, left), (top + len(rows) - 1, left + columns - 1)), rows)
+
+
+class RangeSnapshot(object):
+    """
+    Texts of a range of cells read at once, all checks run locally
+    (on numpy arrays when numpy is available)
+    """
+    def __init__(self, address, texts):
+        self.address = address
+        self.top, self.left = parse_range(address)[0] if address else (0, 0)
+        self.texts = texts
+        numbers = [[to_number(x) for x in row] for row in texts]
+        if numpy is not None:
+            self.numbers = numpy.array([[float('nan') if x is None else x for x in row] for row in numbers],
+                                       dtype=float).reshape(len(texts), len(texts[0]) if texts else 0)
+        else:
+            self.numbers = numbers
+
+    def name(self, row, column):
+        """
+        Returns address of cell at row and column of the snapshot
+        """
+        return cell_name(self.top + row, self.left + column)
+
+    def _where(self, matrix):
+        """
+        Returns (row, column) positions of true values of 2-D boolean matrix
+        """
+        if numpy is not None:
+            return [tuple(x) for x in numpy.argwhere(matrix)]
+        return [(row, column) for row, values in enumerate(matrix)
+                for column, value in enumerate(values) if value]
+
+    def _map(self, function):
+        if numpy is not None:
+            return function(self.numbers)
+        return [[function(x) for x in row] for row in self.numbers]
+
+    def assert_numbers(self):
+        """
+        All cells contain numbers
+        """
+        if numpy is not None:
+            missing = self._where(numpy.isnan(self.numbers))
+        else:
+            missing = self._where(self._map(lambda x: x is None))
+        if missing:
+            row, column = missing[0]
+            raise AssertionError("Cell %s is not a number: %s" % (self.name(row, column), self.texts[row][column]))
+
+    def assert_bounds(self, low, high, strict=True):
+        """
+        All cells contain numbers between low and high
+        """
+        self.assert_numbers()
+        low, high = float(low), float(high)
+        if strict:
+            outside = self._where(self._map(lambda x: (x <= low) | (x >= high)))
+        else:
+            outside = self._where(self._map(lambda x: (x < low) | (x > high)))
+        if outside:
+            row, column = outside[0]
+            raise AssertionError("Value in cell %s is %s, should be between %s and %s" % (
+                self.name(row, column), self.texts[row][column], low, high))
+
+    def assert_unique(self):
+        """
+        No two cells have the same value (numbers are compared as numbers)
+        """
+        seen = {}
+        numeric = numpy is not None and not numpy.isnan(self.numbers).any()
+        if numeric:
+            flat = self.numbers.ravel()
+            order = numpy.argsort(flat, kind='mergesort')
+            same = numpy.flatnonzero(flat[order][1:] == flat[order][:-1])
+            if len(same):
+                first, second = [divmod(int(order[x]), self.numbers.shape[1]) for x in (same[0], same[0] + 1)]
+                raise AssertionError("Two same values in table (Cell: %s, Cell: %s)! Value: %s" % (
+                    self.name(*first), self.name(*second), self.texts[first[0]][first[1]]))
+            return
+        for row, values in enumerate(self.texts):
+            for column, text in enumerate(values):
+                number = to_number(text)
+                key = text if number is None else number
+                if key in seen:
+                    raise AssertionError("Two same values in table (Cell: %s, Cell: %s)! Value: %s" % (
+                        self.name(*seen[key]), self.name(row, column), text))
+                seen[key] = (row, column)
+
+    def assert_equals(self, expected):
+        """
+        Cells equal 2-D list of expected values (as numbers if both are numbers)
+        """
+        assert len(expected) == len(self.texts) and \
+            all([len(x) == len(y) for x, y in zip(expected, self.texts)]), \
+            "Range %s has %d rows, expected %d" % (self.address, len(self.texts), len(expected))
+        for row, values in enumerate(expected):
+            for column, value in enumerate(values):
+                value = _text(value)
+                text = self.texts[row][column]
+                number, expected_number = to_number(text), to_number(value)
+                if number is not None and expected_number is not None:
+                    equal = number == expected_number
+                else:
+                    equal = text == value
+                assert equal, "text in cell %s is incorrect, is: %s, should be: %s" % (
+                    self.name(row, column), text, value)
+
+    def assert_format(self, pattern):
+        """
+        Text of every cell matches regular expression
+        """
+        regex = re.compile(pattern, re.UNICODE)
+        for row, values in enumerate(self.texts):
+            for column, text in enumerate(values):
+                assert regex.match(text), "Text in cell %s is %s, it does not match %s" % (
+                    self.name(row, column), text, pattern)
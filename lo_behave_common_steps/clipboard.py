@@ -0,0 +1,57 @@
+# -*- coding: UTF-8 -*-
+import subprocess
+
+from gi.repository import Gtk, Gdk
+
+from lo_behave_common_steps.events import pump_events
+
+
+def set_clipboard_text(text):
+    """
+    Put text to CLIPBOARD selection and hand it over to clipboard manager
+    (if there is one), so the data outlive this process
+    """
+    clipboard = Gtk.Clipboard.get(Gdk.SELECTION_CLIPBOARD)
+    clipboard.set_text(text, -1)
+    clipboard.store()
+    pump_events()
+
+
+def set_clipboard_html(html):
+    """
+    Put HTML to CLIPBOARD selection. Gtk offers only text from Python, so
+    xclip owns the selection (it keeps serving it in the background).
+    """
+    try:
+        xclip = subprocess.Popen(['xclip', '-selection', 'clipboard', '-t', 'text/html', '-i'],
+                                 stdin=subprocess.PIPE)
+    except OSError:
+        raise AssertionError("xclip is needed to paste HTML")
+    xclip.communicate(html.encode('utf-8'))
+    assert xclip.returncode == 0, "xclip failed with %d" % xclip.returncode
+    pump_events()
+
+
+def get_clipboard_text():
+    """
+    Returns text in CLIPBOARD selection (or None)
+    """
+    return Gtk.Clipboard.get(Gdk.SELECTION_CLIPBOARD).wait_for_text()
+
+
+def to_tsv(rows):
+    """
+    Returns tab separated text of 2-D sequence of values
+    """
+    return u"\n".join([u"\t".join([value_to_text(x) for x in row]) for row in rows]) + u"\n"
+
+
+def value_to_text(value):
+    """
+    Returns unicode of value, tab and newline characters are not allowed
+    """
+    if isinstance(value, str):
+        value = value.decode('utf-8')
+    text = value if isinstance(value, unicode) else unicode(value)
+    assert '\t' not in text and '\n' not in text, "Value %r cannot be pasted as TSV" % text
+    return text
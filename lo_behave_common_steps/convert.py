@@ -0,0 +1,185 @@
+# -*- coding: UTF-8 -*-
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+from collections import namedtuple
+from distutils.spawn import find_executable
+from subprocess import call, Popen, PIPE
+from time import time
+
+from lo_behave_common_steps import odf
+from lo_behave_common_steps.profile import ProfileCache, program_dir, user_installation_url
+
+# Target formats of --convert-to by source document
+TARGETS = {
+    '.odt': ['doc', 'docx', 'rtf', 'pdf'],
+    '.ods': ['xls', 'xlsx', 'pdf'],
+    '.odp': ['ppt', 'pptx', 'pdf'],
+    '.odg': ['pdf'],
+}
+
+# Converted documents are read back (converted to the source format), PDF is read by pdftotext
+NOT_IMPORTED = ['pdf']
+
+Conversion = namedtuple('Conversion', ['source', 'target', 'seconds', 'problems'])
+
+# Profile of the pool worker process
+WORKER = {}
+
+
+def soffice_convert(sources, target, outdir, profile, timeout=300):
+    """
+    Convert documents by one headless soffice (with user installation
+    profile) to format target in outdir. Returns paths of results.
+    """
+    env = dict(os.environ)
+    # headless soffice is not a part of the GUI session on the display
+    env.pop('DISPLAY', None)
+    with open(os.devnull, 'w') as devnull:
+        call(['timeout', str(timeout), os.path.join(program_dir(), 'soffice'), '--headless', '--norestore',
+              '-env:UserInstallation=%s' % user_installation_url(profile),
+              '--convert-to', target, '--outdir', outdir] + list(sources), env=env, stdout=devnull, stderr=devnull)
+    extension = target.split(':')[0]
+    return [os.path.join(outdir, '%s.%s' % (os.path.splitext(os.path.basename(x))[0], extension)) for x in sources]
+
+
+def content(path):
+    """
+    Returns comparable content of ODF document: non-empty cells
+    (sheet, row, column, text) of spreadsheet, paragraphs of text
+    document, (page, text) of paragraphs of presentation and drawing
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.ods':
+        cells = []
+        for sheet, index, repeated, row in odf.iter_rows(path):
+            column = 0
+            for text, count in row:
+                if text:
+                    for row_number in xrange(index, index + repeated):
+                        cells.extend([(sheet, row_number, x, text) for x in xrange(column, column + count)])
+                column += count
+        return cells
+    if extension == '.odt':
+        return [x for x in odf.paragraphs(path) if x.strip()]
+    return [(number, text) for number, texts in enumerate(odf.page_texts(path))
+            for text in texts if text.strip()]
+
+
+def _texts(items):
+    return [x if isinstance(x, unicode) else x[-1] for x in items]
+
+
+def _normalize(text):
+    return re.sub(r'\s+', u' ', text).strip()
+
+
+def pdf_problems(source_content, path):
+    """
+    Texts of source missing in PDF (only the file is checked without pdftotext)
+    """
+    if not os.path.isfile(path):
+        return ["%s was not converted" % os.path.basename(path)]
+    with open(path, 'rb') as pdf:
+        if pdf.read(5) != '%PDF-':
+            return ["%s is not a PDF document" % os.path.basename(path)]
+    if not find_executable('pdftotext'):
+        return []
+    text = _normalize(Popen(['pdftotext', '-enc', 'UTF-8', path, '-'], stdout=PIPE).communicate()[0].decode('utf-8'))
+    return [u"'%s' is missing" % x for x in _texts(source_content) if _normalize(x) not in text]
+
+
+def content_problems(source_content, path):
+    """
+    Differences between content of source and of converted document read back
+    """
+    if not os.path.isfile(path):
+        return ["%s was not converted back" % os.path.basename(path)]
+    result = content(path)
+    if result == source_content:
+        return []
+    found, expected = set(result), set(source_content)
+    missing = [x for x in source_content if x not in found]
+    added = [x for x in result if x not in expected]
+    problems = [u"%r is missing" % (x,) for x in missing[:5]] + [u"%r was added" % (x,) for x in added[:5]]
+    return problems or [u"order of content differs"]
+
+
+def _init_worker(root):
+    WORKER['profile'] = ProfileCache().clone(tempfile.mkdtemp(prefix='worker-', dir=root))
+    WORKER['root'] = root
+
+
+def _convert_batch(job):
+    """
+    Convert batch of sources to target and back (worker of the pool)
+    """
+    sources, target = job
+    profile = WORKER['profile']
+    work = tempfile.mkdtemp(prefix='batch-', dir=WORKER['root'])
+    try:
+        start = time()
+        results = soffice_convert(sources, target, os.path.join(work, 'converted'), profile)
+        seconds = (time() - start) / len(sources)
+        if target in NOT_IMPORTED:
+            back = [None] * len(sources)
+        else:
+            back = {}
+            for extension in set([os.path.splitext(x)[1] for x in sources]):
+                converted = [r for s, r in zip(sources, results) if s.endswith(extension) and os.path.isfile(r)]
+                if converted:
+                    back.update(zip(converted, soffice_convert(
+                        converted, extension[1:], os.path.join(work, 'back'), profile)))
+            back = [back.get(x) for x in results]
+        conversions = []
+        for source, result, returned in zip(sources, results, back):
+            if not os.path.isfile(result):
+                problems = ["%s was not converted" % os.path.basename(source)]
+            elif returned is None:
+                problems = pdf_problems(content(source), result)
+            else:
+                problems = content_problems(content(source), returned)
+            conversions.append(Conversion(source, target, seconds, problems))
+        return conversions
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def conversion_matrix(sources, targets=None):
+    """
+    Returns list of (source, target) of sources and their target formats
+    (TARGETS by default)
+    """
+    matrix = []
+    for source in sources:
+        extension = os.path.splitext(source)[1].lower()
+        for target in (targets or TARGETS.get(extension, [])):
+            matrix.append((source, target))
+    return matrix
+
+
+def convert_matrix(matrix, workers=None, batch=10):
+    """
+    Convert (source, target) pairs by pool of workers, each of them has own
+    LibreOffice profile. Sources of the same target are converted in
+    batches by one soffice. Returns (list of Conversion, documents per second).
+    """
+    ProfileCache().build()
+    batches = {}
+    for source, target in matrix:
+        batches.setdefault(target, []).append(source)
+    jobs = [(sources[x:x + batch], target) for target, sources in sorted(batches.items())
+            for x in xrange(0, len(sources), batch)]
+    workers = min(workers or multiprocessing.cpu_count(), len(jobs)) or 1
+    root = tempfile.mkdtemp(prefix='lo-convert-')
+    start = time()
+    pool = multiprocessing.Pool(workers, _init_worker, (root,))
+    try:
+        conversions = [x for batch_result in pool.map(_convert_batch, jobs, chunksize=1) for x in batch_result]
+    finally:
+        pool.close()
+        pool.join()
+        shutil.rmtree(root, ignore_errors=True)
+    return conversions, len(conversions) / max(time() - start, 0.001)
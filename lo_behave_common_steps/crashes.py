@@ -0,0 +1,131 @@
+# -*- coding: UTF-8 -*-
+import ctypes
+import ctypes.util
+import os
+import struct
+import threading
+from Queue import Queue, Empty
+from time import sleep
+
+import problem
+
+ABRT_DUMP_DIR = '/var/spool/abrt'
+
+# inotify(7)
+IN_CREATE = 0x00000100
+IN_MOVED_TO = 0x00000080
+IN_CLOSE_WRITE = 0x00000008
+IN_ONLYDIR = 0x01000000
+EVENT_HEADER = 'iIII'
+
+
+def _inotify():
+    """
+    Returns libc if it provides inotify, None otherwise
+    """
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+def _problem_id(crash):
+    return getattr(crash, '_probdir', None) or id(crash)
+
+
+class CrashWatcher(object):
+    """
+    Watches abrt dump directory in a background thread and queues problems
+    as they appear, so the steps do not have to ask abrtd after each step.
+    Falls back to polling abrtd when inotify is not available.
+    """
+    def __init__(self, directory=ABRT_DUMP_DIR, poll=2):
+        self.directory = directory
+        self.poll = poll
+        self.queue = Queue()
+        self.seen = set()
+        self.thread = None
+        self.running = False
+        self.lock = threading.Lock()
+
+    def start(self):
+        """
+        Forget crashes reported so far and start watching
+        """
+        self.seen = set([_problem_id(x) for x in problem.list()])
+        self.running = True
+        libc = _inotify()
+        fd = -1
+        if libc and os.path.isdir(self.directory):
+            fd = libc.inotify_init()
+            if fd >= 0 and libc.inotify_add_watch(
+                    fd, self.directory, IN_CREATE | IN_MOVED_TO | IN_CLOSE_WRITE | IN_ONLYDIR) < 0:
+                os.close(fd)
+                fd = -1
+        if fd >= 0:
+            self.thread = threading.Thread(target=self._watch, args=(fd,))
+        else:
+            self.thread = threading.Thread(target=self._poll)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+
+    def collect(self):
+        """
+        Ask abrtd for problems and queue the new ones, returns their count
+        """
+        found = 0
+        with self.lock:
+            for crash in problem.list():
+                if _problem_id(crash) not in self.seen:
+                    self.seen.add(_problem_id(crash))
+                    self.queue.put(crash)
+                    found += 1
+        return found
+
+    def _watch(self, fd):
+        while self.running:
+            try:
+                data = os.read(fd, 4096)
+            except OSError:
+                break
+            # abrt writes the dump directory under a temporary name and renames it
+            # when complete, so only renamed directories are reported
+            offset = 0
+            complete = False
+            while offset < len(data):
+                wd, mask, cookie, length = struct.unpack_from(EVENT_HEADER, data, offset)
+                offset += struct.calcsize(EVENT_HEADER) + length
+                complete = complete or bool(mask & IN_MOVED_TO)
+            # abrtd may need a moment to pick the new directory up
+            for attempt in xrange(10 if complete else 0):
+                try:
+                    if self.collect():
+                        break
+                except Exception:
+                    pass
+                sleep(0.5)
+        os.close(fd)
+
+    def _poll(self):
+        while self.running:
+            try:
+                self.collect()
+            except Exception:
+                pass
+            sleep(self.poll)
+
+    def drain(self):
+        """
+        Returns list of problems queued since the last call
+        """
+        crashes = []
+        while True:
+            try:
+                crashes.append(self.queue.get_nowait())
+            except Empty:
+                return crashes
@@ -0,0 +1,60 @@
+# -*- coding: UTF-8 -*-
+from time import time
+
+import pyatspi
+from gi.repository import GLib
+
+
+def register(callback, *event_names):
+    """
+    Register callback for given AT-SPI event types
+    """
+    pyatspi.Registry.registerEventListener(callback, *event_names)
+
+
+def deregister(callback, *event_names):
+    """
+    Remove callback registered by register()
+    """
+    pyatspi.Registry.deregisterEventListener(callback, *event_names)
+
+
+def pump_events():
+    """
+    Dispatch all AT-SPI events queued on the default main context.
+    Events are delivered only while somebody iterates the main context,
+    so call this before reading any state fed by event listeners.
+    """
+    main_context = GLib.MainContext.default()
+    while main_context.pending():
+        main_context.iteration(False)
+
+
+def wait_for(predicate, timeout=10, poll=0.5):
+    """
+    Iterate the main context until predicate() returns true value or timeout
+    (in seconds) expires. Returns the last value of predicate().
+
+    The wait blocks on the main context, so it wakes up as soon as an event
+    arrives. poll is the longest time to sleep without re-checking predicate
+    (for states that do not emit any event, e.g. a file on disk).
+    """
+    deadline = time() + timeout
+    main_context = GLib.MainContext.default()
+    while True:
+        pump_events()
+        result = predicate()
+        remaining = deadline - time()
+        if result or remaining <= 0:
+            return result
+
+        fired = []
+
+        def wake():
+            fired.append(True)
+            return False
+
+        wakeup = GLib.timeout_add(int(min(remaining, poll) * 1000) + 1, wake)
+        main_context.iteration(True)
+        if not fired:
+            GLib.source_remove(wakeup)
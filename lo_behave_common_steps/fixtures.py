@@ -0,0 +1,124 @@
+# -*- coding: UTF-8 -*-
+import hashlib
+import json
+import os
+import random
+import tempfile
+import zipfile
+from cgi import escape
+
+MIMETYPE = 'application/vnd.oasis.opendocument.spreadsheet'
+
+MANIFEST = """<?xml version="1.0" encoding="UTF-8"?>
+<manifest:manifest xmlns:manifest="urn:oasis:names:tc:opendocument:xmlns:manifest:1.0" manifest:version="1.2">
+ <manifest:file-entry manifest:full-path="/" manifest:version="1.2" manifest:media-type="%s"/>
+ <manifest:file-entry manifest:full-path="content.xml" manifest:media-type="text/xml"/>
+</manifest:manifest>
+""" % MIMETYPE
+
+CONTENT_START = """<?xml version="1.0" encoding="UTF-8"?>
+<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" \
+xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0" \
+xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0" \
+xmlns:of="urn:oasis:names:tc:opendocument:xmlns:of:1.2" office:version="1.2">
+<office:body><office:spreadsheet>
+"""
+CONTENT_END = """</office:spreadsheet></office:body></office:document-content>
+"""
+
+WORDS = [u'apple', u'コンサート', u'Доброе утро', u'ř', u'Test', u'最高', u'lorem ipsum', u'Batman']
+
+# Rows written to content.xml at once
+CHUNK = 1000
+
+
+def fixtures_dir():
+    """
+    Returns directory of generated fixtures (kept across runs)
+    """
+    cache_home = os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(cache_home, 'lo-behave', 'fixtures')
+
+
+def generated_cell(generator, row, column, formulas, strings):
+    """
+    Returns (XML, displayed text) of one generated cell: a formula (it refers
+    to the first cell of the row, text is None), a string or a number
+    """
+    if column and generator.random() < formulas:
+        return u'<table:table-cell table:formula="of:=[.A%d]*%d" office:value-type="float" office:value="0"/>' % (
+            row + 1, column + 1), None
+    if generator.random() < strings:
+        text = u'%s %d' % (generator.choice(WORDS), row)
+        return u'<table:table-cell office:value-type="string"><text:p>%s</text:p></table:table-cell>' % (
+            escape(text)), text
+    text = (u'%.2f' % (generator.randint(-100000, 100000) / 100.0)).rstrip(u'0').rstrip(u'.')
+    return u'<table:table-cell office:value-type="float" office:value="%s"><text:p>%s</text:p></table:table-cell>' % (
+        text, text), text
+
+
+def first_cell_text(rows, columns, sheets=1, formulas=0.0, strings=0.0, seed=0):
+    """
+    Returns text of A1 of generated document (displayed when it is loaded)
+    """
+    return generated_cell(random.Random(seed), 0, 0, formulas, strings)[1]
+
+
+def write_content(content, rows, columns, sheets, formulas, strings, seed):
+    """
+    Stream content.xml of sheets of rows x columns generated cells to file
+    """
+    generator = random.Random(seed)
+    content.write(CONTENT_START)
+    for sheet in xrange(sheets):
+        content.write('<table:table table:name="Sheet%d">\n' % (sheet + 1))
+        content.write('<table:table-column table:number-columns-repeated="%d"/>\n' % columns)
+        for start in xrange(0, rows, CHUNK):
+            lines = []
+            for row in xrange(start, min(start + CHUNK, rows)):
+                lines.append(u'<table:table-row>%s</table:table-row>' % u''.join(
+                    [generated_cell(generator, row, column, formulas, strings)[0] for column in xrange(columns)]))
+            content.write(u'\n'.join(lines).encode('utf-8') + '\n')
+        content.write('</table:table>\n')
+    content.write(CONTENT_END)
+
+
+def generate_ods(path, rows, columns, sheets=1, formulas=0.0, strings=0.0, seed=0):
+    """
+    Write ODS document with generated cells. content.xml is streamed to a
+    temporary file and compressed into the zip, memory use does not grow
+    with the size of the document.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    handle, content_path = tempfile.mkstemp(prefix='content-', suffix='.xml', dir=directory)
+    try:
+        with os.fdopen(handle, 'wb') as content:
+            write_content(content, rows, columns, sheets, formulas, strings, seed)
+        document = zipfile.ZipFile(path + '.tmp', 'w', zipfile.ZIP_DEFLATED, allowZip64=True)
+        try:
+            # mimetype has to be the first entry, not compressed
+            document.writestr(zipfile.ZipInfo('mimetype'), MIMETYPE, zipfile.ZIP_STORED)
+            document.writestr('META-INF/manifest.xml', MANIFEST)
+            document.write(content_path, 'content.xml')
+        finally:
+            document.close()
+        os.rename(path + '.tmp', path)
+    finally:
+        os.remove(content_path)
+    return path
+
+
+def spreadsheet_fixture(rows, columns, sheets=1, formulas=0.0, strings=0.0, seed=0, directory=None):
+    """
+    Returns path of generated ODS document, documents are cached by hash of
+    their parameters
+    """
+    directory = directory or fixtures_dir()
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    parameters = json.dumps([rows, columns, sheets, formulas, strings, seed])
+    path = os.path.join(directory, 'calc-%dx%dx%d-%s.ods' % (
+        rows, columns, sheets, hashlib.sha1(parameters).hexdigest()[:12]))
+    if not os.path.exists(path):
+        generate_ods(path, rows, columns, sheets, formulas, strings, seed)
+    return path
@@ -0,0 +1,72 @@
+# -*- coding: UTF-8 -*-
+import os
+import sys
+from time import time
+
+from lo_behave_common_steps.events import register, deregister, wait_for
+
+EVENTS = ['object', 'window', 'focus']
+
+# (label, fixed delay it replaced, seconds it took to settle, settled)
+SETTLED = []
+
+
+def cpu_seconds(pids):
+    """
+    Returns CPU time (user + system) used by processes so far
+    """
+    ticks = 0
+    for pid in pids:
+        try:
+            fields = open('/proc/%d/stat' % pid).read().rsplit(')', 1)[1].split()
+        except (IOError, IndexError):
+            continue
+        # utime and stime are 14th and 15th fields of stat, i.e. 12th and 13th after the comm
+        ticks += int(fields[11]) + int(fields[12])
+    return float(ticks) / os.sysconf('SC_CLK_TCK')
+
+
+def wait_until_idle(app, quiet_ms=300, timeout=10, cpu=0.05, replaces=None, label=None):
+    """
+    Wait until soffice settles: no a11y event of the app arrived for quiet_ms
+    and soffice.bin used less than cpu (share of one core) meanwhile.
+    Returns True if it settled before timeout (in seconds). Time it took is
+    recorded together with the fixed delay it replaces (see settle_times).
+    """
+    quiet = quiet_ms / 1000.0
+    label = label or sys._getframe(1).f_code.co_name
+    start = time()
+    last_event = [start]
+    sample = [start, cpu_seconds(app.session_pids())]
+
+    def on_event(event):
+        try:
+            if event.host_application.name != app.a11yAppName:
+                return
+        except Exception:
+            pass
+        last_event[0] = time()
+
+    def settled():
+        now = time()
+        used = cpu_seconds(app.session_pids())
+        busy = (used - sample[1]) / max(now - sample[0], 0.001)
+        sample[:] = [now, used]
+        return now - last_event[0] >= quiet and busy <= cpu
+
+    register(on_event, *EVENTS)
+    try:
+        idle = bool(wait_for(settled, timeout=timeout, poll=quiet / 2))
+    finally:
+        deregister(on_event, *EVENTS)
+    SETTLED.append((label, replaces, time() - start, idle))
+    return idle
+
+
+def settle_times():
+    """
+    Returns and forgets waits recorded by wait_until_idle
+    """
+    records = SETTLED[:]
+    del SETTLED[:]
+    return records
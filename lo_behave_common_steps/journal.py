@@ -0,0 +1,78 @@
+# -*- coding: UTF-8 -*-
+import grp
+import os
+from datetime import datetime
+from subprocess import Popen, PIPE
+
+try:
+    from systemd import journal
+except ImportError:
+    journal = None
+
+CURSOR_PREFIX = '-- cursor: '
+
+
+def _can_read_journal():
+    """
+    System journal is readable only by root and members of these groups
+    """
+    if os.geteuid() == 0:
+        return True
+    groups = [grp.getgrgid(x).gr_name for x in os.getgroups()]
+    return any([x in groups for x in ['systemd-journal', 'adm', 'wheel']])
+
+
+class JournalCollector(object):
+    """
+    Returns journal messages of an executable logged since the previous call.
+    Remembers cursor of the last read entry, so every entry is read once.
+    Uses python-systemd if available, journalctl otherwise.
+    """
+    def __init__(self, executable='/usr/bin/gnome-session'):
+        self.executable = executable
+        self.cursor = None
+        self.since = datetime.now()
+        self.reader = None
+        if journal is not None and _can_read_journal():
+            self.reader = journal.Reader()
+            self.reader.add_match(_EXE=executable)
+
+    def _read_reader(self):
+        if self.cursor:
+            self.reader.seek_cursor(self.cursor)
+            # seek_cursor positions on the entry which was already read
+            self.reader.get_next()
+        else:
+            self.reader.seek_realtime(self.since)
+        messages = []
+        for entry in self.reader:
+            messages.append(entry.get('MESSAGE', ''))
+            self.cursor = entry['__CURSOR']
+        return messages
+
+    def _read_journalctl(self):
+        command = ['journalctl', self.executable, '--no-pager', '-o', 'cat', '--show-cursor']
+        if self.cursor:
+            command.append('--after-cursor=%s' % self.cursor)
+        else:
+            command.append('--since=%s' % self.since.strftime("%Y-%m-%d %H:%M:%S"))
+        if os.geteuid() != 0:
+            command = ['sudo', '-n'] + command
+        output = Popen(command, stdout=PIPE, stderr=PIPE).communicate()[0]
+        messages = []
+        for line in output.splitlines():
+            if line.startswith(CURSOR_PREFIX):
+                self.cursor = line[len(CURSOR_PREFIX):]
+            elif not line.startswith('-- No entries'):
+                messages.append(line)
+        return messages
+
+    def read(self):
+        """
+        Returns text of messages logged since the previous call (or start)
+        """
+        if self.reader is not None:
+            messages = self._read_reader()
+        else:
+            messages = self._read_journalctl()
+        return "\n".join([x if isinstance(x, basestring) else str(x) for x in messages])
@@ -0,0 +1,345 @@
+# -*- coding: UTF-8 -*-
+import mmap
+import re
+import shutil
+import struct
+import tempfile
+import zipfile
+from datetime import datetime
+from decimal import Decimal
+
+# Entries of embedded HSQLDB 1.8 database in .odb zip
+SCRIPT = 'database/script'
+PROPERTIES = 'database/properties'
+DATA = 'database/data'
+FIREBIRD = 'database/firebird.fbk'
+
+CREATE_RE = re.compile(r'CREATE (?:(MEMORY|CACHED|TEXT|TEMP) )?TABLE ((?:PUBLIC\.)?(?:"(?:[^"]|"")+"|\w+))\s*\((.*)\)\s*$')
+INDEX_RE = re.compile(r"SET TABLE ((?:PUBLIC\.)?(?:\"(?:[^\"]|\"\")+\"|\w+)) INDEX\s*'([^']*)'")
+INSERT_RE = re.compile(r'INSERT INTO ((?:PUBLIC\.)?(?:"(?:[^"]|"")+"|\w+)) VALUES\s*\((.*)\)\s*$')
+VALUE_RE = re.compile(r"\s*(?:'((?:[^']|'')*)'|(NULL|TRUE|FALSE)|([-+0-9.Ee]+))\s*(?:,|$)")
+UNICODE_ESCAPE_RE = re.compile(r'\\u([0-9a-fA-F]{4})')
+CONSTRAINTS = ['CONSTRAINT', 'PRIMARY', 'UNIQUE', 'FOREIGN', 'CHECK']
+
+# Integer types by HSQLDB type name
+INTEGERS = {'TINYINT': 'h', 'SMALLINT': 'h', 'INTEGER': 'i', 'INT': 'i', 'BIGINT': 'q', 'IDENTITY': 'i'}
+FLOATS = ['DOUBLE', 'FLOAT', 'REAL']
+DECIMALS = ['NUMERIC', 'DECIMAL']
+STRINGS = ['CHAR', 'CHARACTER', 'VARCHAR', 'VARCHAR_IGNORECASE', 'LONGVARCHAR']
+BINARIES = ['BINARY', 'VARBINARY', 'LONGVARBINARY', 'OTHER', 'OBJECT']
+
+INT = struct.Struct('>i')
+NODE = struct.Struct('>iiii')
+
+
+def _name(name):
+    """
+    Returns table or column name as stored in the script (unquoted names are upper case)
+    """
+    if name.startswith('PUBLIC.'):
+        name = name[len('PUBLIC.'):]
+    if name.startswith('"'):
+        return _unescape(name[1:-1].replace('""', '"'))
+    return _unescape(name.upper())
+
+
+def _unescape(text):
+    """
+    Script is ASCII, other characters are written as \\uXXXX
+    """
+    return UNICODE_ESCAPE_RE.sub(lambda x: unichr(int(x.group(1), 16)), text.decode('ascii'))
+
+
+def _split(definitions):
+    """
+    Split column definitions on commas out of parentheses and quotes
+    """
+    parts, depth, quote, start = [], 0, None, 0
+    for position, char in enumerate(definitions):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            parts.append(definitions[start:position].strip())
+            start = position + 1
+    parts.append(definitions[start:].strip())
+    return parts
+
+
+class Table(object):
+    """
+    Table of embedded database: name, kind (MEMORY or CACHED), columns as
+    (name, type) and roots of its indexes in the data file
+    """
+    def __init__(self, name, kind, columns):
+        self.name = name
+        self.kind = kind
+        self.columns = columns
+        self.roots = []
+
+    def column_names(self):
+        return [x[0] for x in self.columns]
+
+
+class Database(object):
+    """
+    Read only view of embedded HSQLDB database of .odb file. Rows of CACHED
+    tables are read from the data file (in order of the primary key),
+    rows of MEMORY tables from INSERTs of the script.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.zip = zipfile.ZipFile(path)
+        entries = self.zip.namelist()
+        if SCRIPT not in entries:
+            if FIREBIRD in entries:
+                raise NotImplementedError("%s has embedded Firebird database, only HSQLDB is supported" % path)
+            raise ValueError("%s has no embedded database" % path)
+        self.scale = int(self._properties().get('hsqldb.cache_file_scale', 1))
+        self.tables = {}
+        self._read_ddl()
+
+    def close(self):
+        self.zip.close()
+
+    def _properties(self):
+        if PROPERTIES not in self.zip.namelist():
+            return {}
+        properties = {}
+        for line in self.zip.read(PROPERTIES).splitlines():
+            if '=' in line and not line.startswith('#'):
+                key, value = line.split('=', 1)
+                properties[key.strip()] = value.strip()
+        return properties
+
+    def _read_ddl(self):
+        """
+        Parse tables and roots of their indexes from the script
+        """
+        script = self.zip.open(SCRIPT)
+        try:
+            for line in script:
+                if line.startswith('CREATE '):
+                    match = CREATE_RE.match(line.rstrip('\r\n'))
+                    if match:
+                        self._create(match.group(1) or 'MEMORY', _name(match.group(2)), match.group(3))
+                elif line.startswith('SET TABLE '):
+                    match = INDEX_RE.match(line)
+                    if match and _name(match.group(1)) in self.tables:
+                        # roots of all indexes followed by the next identity value
+                        self.tables[_name(match.group(1))].roots = [int(x) for x in match.group(2).split()[:-1]]
+        finally:
+            script.close()
+
+    def _inserted_rows(self, table):
+        """
+        Yields rows of memory table, they are INSERTs of the script
+        """
+        script = self.zip.open(SCRIPT)
+        try:
+            for line in script:
+                if line.startswith('INSERT INTO '):
+                    match = INSERT_RE.match(line.rstrip('\r\n'))
+                    if match and _name(match.group(1)) == table.name:
+                        yield self._values(match.group(2), table)
+        finally:
+            script.close()
+
+    def _create(self, kind, name, definitions):
+        columns = []
+        for definition in _split(definitions):
+            if definition.split(' ', 1)[0].upper() in CONSTRAINTS:
+                continue
+            match = re.match(r'("(?:[^"]|"")+"|\w+)\s+(\w+)', definition)
+            if match:
+                columns.append((_name(match.group(1)), match.group(2).upper()))
+        self.tables[name] = Table(name, kind, columns)
+
+    def _values(self, text, table):
+        values = []
+        position = 0
+        for name, kind in table.columns:
+            match = VALUE_RE.match(text, position)
+            if not match:
+                raise ValueError("Can not parse values of %s: %s" % (table.name, text))
+            position = match.end()
+            string, constant, number = match.groups()
+            if string is not None:
+                values.append(_script_value(_unescape(string.replace("''", "'")), kind))
+            elif constant is not None:
+                values.append({'NULL': None, 'TRUE': True, 'FALSE': False}[constant])
+            else:
+                values.append(_script_value(number, kind))
+        return tuple(values)
+
+    def table(self, name):
+        """
+        Returns Table named name (name as in the database, e.g. 'mytable')
+        """
+        if name not in self.tables:
+            raise KeyError("Table %s not found in %s, there are: %s" % (
+                name, self.path, ', '.join(sorted(self.tables))))
+        return self.tables[name]
+
+    def rows(self, name):
+        """
+        Yields rows of table as tuples
+        """
+        table = self.table(name)
+        if table.kind == 'CACHED':
+            return self._cached_rows(table)
+        if table.kind == 'MEMORY':
+            return self._inserted_rows(table)
+        raise NotImplementedError("Reading rows of %s table %s is not supported" % (table.kind, name))
+
+    def _cached_rows(self, table):
+        if not table.roots or table.roots[0] <= 0:
+            return
+        # data file is copied out of the zip (zip members can not seek)
+        data = tempfile.TemporaryFile(prefix='odb-data-')
+        try:
+            source = self.zip.open(DATA)
+            try:
+                shutil.copyfileobj(source, data, 1024 * 1024)
+            finally:
+                source.close()
+            data.flush()
+            view = mmap.mmap(data.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                for row in _traverse(view, table, self.scale):
+                    yield row
+            finally:
+                view.close()
+        finally:
+            data.close()
+
+
+def _traverse(view, table, scale):
+    """
+    Yields rows of cached table in order of the primary index (AVL tree
+    whose nodes are stored in the rows, walked without recursion)
+    """
+    indexes = len(table.roots)
+    stack = []
+    position = table.roots[0]
+    while stack or position > 0:
+        while position > 0:
+            stack.append(position)
+            position = NODE.unpack_from(view, position * scale + INT.size)[1]
+        position = stack.pop()
+        offset = position * scale
+        yield _read_row(view, offset + INT.size + NODE.size * indexes, table)
+        position = NODE.unpack_from(view, offset + INT.size)[2]
+
+
+def _read_row(view, offset, table):
+    """
+    Decode row of cached table (RowOutputBinary of HSQLDB 1.8): every column
+    is a byte telling whether it is null followed by the value
+    """
+    values = []
+    for name, kind in table.columns:
+        present = ord(view[offset])
+        offset += 1
+        if not present:
+            values.append(None)
+            continue
+        if kind in INTEGERS:
+            value = struct.unpack_from('>' + INTEGERS[kind], view, offset)[0]
+            offset += struct.calcsize(INTEGERS[kind])
+        elif kind in FLOATS:
+            value = struct.unpack_from('>d', view, offset)[0]
+            offset += 8
+        elif kind in ['BOOLEAN', 'BIT']:
+            value = bool(ord(view[offset]))
+            offset += 1
+        elif kind in ['DATE', 'TIME']:
+            milliseconds = struct.unpack_from('>q', view, offset)[0]
+            offset += 8
+            moment = datetime.fromtimestamp(milliseconds / 1000.0)
+            value = moment.date() if kind == 'DATE' else moment.time()
+        elif kind == 'TIMESTAMP':
+            milliseconds, nanos = struct.unpack_from('>qi', view, offset)
+            offset += 12
+            value = datetime.fromtimestamp(milliseconds // 1000).replace(microsecond=nanos // 1000)
+        else:
+            length = INT.unpack_from(view, offset)[0]
+            offset += INT.size
+            raw = view[offset:offset + length]
+            offset += length
+            if kind in STRINGS:
+                # Java modified UTF-8
+                value = raw.replace('\xc0\x80', '\x00').decode('utf-8')
+            elif kind in DECIMALS:
+                scale = INT.unpack_from(view, offset)[0]
+                offset += INT.size
+                unscaled = int(raw.encode('hex'), 16) if raw else 0
+                if raw and ord(raw[0]) & 0x80:
+                    unscaled -= 1 << (8 * length)
+                value = Decimal(unscaled).scaleb(-scale)
+            else:
+                value = raw
+        values.append(value)
+    return tuple(values)
+
+
+def _script_value(text, kind):
+    """
+    Convert literal of script INSERT to Python value of column type
+    """
+    if kind in INTEGERS:
+        return int(text)
+    if kind in FLOATS:
+        return float(text)
+    if kind in DECIMALS:
+        return Decimal(text)
+    if kind == 'DATE':
+        return datetime.strptime(text, '%Y-%m-%d').date()
+    if kind == 'TIME':
+        return datetime.strptime(text, '%H:%M:%S').time()
+    if kind == 'TIMESTAMP':
+        return datetime.strptime(text.split('.')[0], '%Y-%m-%d %H:%M:%S').replace(
+            microsecond=int((text.split('.') + ['0'])[1].ljust(6, '0')[:6]))
+    if kind in BINARIES:
+        return text.decode('hex')
+    if isinstance(text, str):
+        return text.decode('ascii')
+    return text
+
+
+def table_names(path):
+    """
+    Returns names of tables of embedded database of .odb file
+    """
+    database = Database(path)
+    try:
+        return sorted(database.tables)
+    finally:
+        database.close()
+
+
+def column_names(path, table):
+    database = Database(path)
+    try:
+        return database.table(table).column_names()
+    finally:
+        database.close()
+
+
+def iter_rows(path, table):
+    """
+    Yields rows of table of embedded database of .odb file as tuples
+    (in order of the primary key for cached tables)
+    """
+    database = Database(path)
+    try:
+        for row in database.rows(table):
+            yield row
+    finally:
+        database.close()
@@ -0,0 +1,223 @@
+# -*- coding: UTF-8 -*-
+import os
+import zipfile
+import xml.etree.cElementTree as ElementTree
+
+from lo_behave_common_steps.calc import parse_cell
+
+try:
+    import xlrd
+except ImportError:
+    xlrd = None
+
+OFFICE = 'urn:oasis:names:tc:opendocument:xmlns:office:1.0'
+TABLE = 'urn:oasis:names:tc:opendocument:xmlns:table:1.0'
+TEXT = 'urn:oasis:names:tc:opendocument:xmlns:text:1.0'
+DRAW = 'urn:oasis:names:tc:opendocument:xmlns:drawing:1.0'
+
+OFFICE_TEXT = '{%s}text' % OFFICE
+OFFICE_ANNOTATION = '{%s}annotation' % OFFICE
+TABLE_TABLE = '{%s}table' % TABLE
+TABLE_NAME = '{%s}name' % TABLE
+TABLE_ROW = '{%s}table-row' % TABLE
+TABLE_CELL = '{%s}table-cell' % TABLE
+TABLE_COVERED_CELL = '{%s}covered-table-cell' % TABLE
+TABLE_ROWS_REPEATED = '{%s}number-rows-repeated' % TABLE
+TABLE_COLUMNS_REPEATED = '{%s}number-columns-repeated' % TABLE
+TEXT_P = '{%s}p' % TEXT
+TEXT_H = '{%s}h' % TEXT
+TEXT_S = '{%s}s' % TEXT
+TEXT_C = '{%s}c' % TEXT
+TEXT_TAB = '{%s}tab' % TEXT
+TEXT_LINE_BREAK = '{%s}line-break' % TEXT
+TEXT_NOTE = '{%s}note' % TEXT
+DRAW_PAGE = '{%s}page' % DRAW
+
+ODF_EXTENSIONS = ['.ods', '.odt', '.odp', '.odg']
+
+
+def _parse(path):
+    """
+    Yields (event, element, parents) of content.xml of ODF document,
+    parents is the list of open elements (the document root first)
+    """
+    parents = []
+    content = zipfile.ZipFile(path).open('content.xml')
+    try:
+        for event, elem in ElementTree.iterparse(content, events=('start', 'end')):
+            if event == 'start':
+                parents.append(elem)
+            else:
+                parents.pop()
+                yield event, elem, parents
+    finally:
+        content.close()
+
+
+def _drop(elem, parents):
+    """
+    Remove processed element from the tree so the memory stays flat
+    """
+    elem.clear()
+    if parents:
+        parents[-1].remove(elem)
+
+
+def element_text(elem):
+    """
+    Returns text of paragraph element (spaces, tabs and line breaks expanded,
+    notes and annotations left out)
+    """
+    parts = [elem.text or u'']
+    for child in elem:
+        if child.tag == TEXT_S:
+            parts.append(u' ' * int(child.get(TEXT_C, 1)))
+        elif child.tag == TEXT_TAB:
+            parts.append(u'\t')
+        elif child.tag == TEXT_LINE_BREAK:
+            parts.append(u'\n')
+        elif child.tag not in [TEXT_NOTE, OFFICE_ANNOTATION]:
+            parts.append(element_text(child))
+        parts.append(child.tail or u'')
+    return u''.join(parts)
+
+
+def _cell_text(cell):
+    return u'\n'.join([element_text(x) for x in cell.findall(TEXT_P)])
+
+
+def iter_rows(path, sheet=None):
+    """
+    Yields (sheet name, row index, repeated, cells) for rows of spreadsheet,
+    cells is list of (text, repeated). Repeated rows and cells (e.g. empty
+    rest of the sheet) are not expanded.
+    """
+    index = 0
+    for event, elem, parents in _parse(path):
+        if elem.tag == TABLE_ROW:
+            name = _table_name(parents)
+            if sheet is None or name == sheet:
+                repeated = int(elem.get(TABLE_ROWS_REPEATED, 1))
+                cells = [(_cell_text(x), int(x.get(TABLE_COLUMNS_REPEATED, 1)))
+                         for x in elem if x.tag in [TABLE_CELL, TABLE_COVERED_CELL]]
+                yield name, index, repeated, cells
+                index += repeated
+            _drop(elem, parents)
+        elif elem.tag == TABLE_TABLE:
+            _drop(elem, parents)
+            index = 0
+
+
+def _table_name(parents):
+    """
+    Returns name of the innermost open table (None outside of tables)
+    """
+    for elem in reversed(parents):
+        if elem.tag == TABLE_TABLE:
+            return elem.get(TABLE_NAME)
+    return None
+
+
+def sheet_names(path):
+    """
+    Returns names of sheets of spreadsheet document
+    """
+    if os.path.splitext(path)[1].lower() == '.xls':
+        return _xls_book(path).sheet_names()
+    names = []
+    for event, elem, parents in _parse(path):
+        if elem.tag == TABLE_TABLE:
+            names.append(elem.get(TABLE_NAME))
+            _drop(elem, parents)
+        elif elem.tag == TABLE_ROW:
+            _drop(elem, parents)
+    return names
+
+
+def _xls_book(path):
+    assert xlrd is not None, "xlrd module is needed to read %s" % path
+    return xlrd.open_workbook(path, on_demand=True)
+
+
+def _xls_cell_text(path, row, col, sheet=None):
+    book = _xls_book(path)
+    table = book.sheet_by_name(sheet) if sheet else book.sheet_by_index(0)
+    if row >= table.nrows or col >= table.ncols:
+        return u''
+    value = table.cell_value(row, col)
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return unicode(value)
+
+
+def cell_text(path, address, sheet=None):
+    """
+    Returns text of cell (e.g. 'B2') in sheet of spreadsheet document
+    (first sheet by default), empty string for empty cells
+    """
+    row, col = parse_cell(address)
+    if os.path.splitext(path)[1].lower() == '.xls':
+        return _xls_cell_text(path, row, col, sheet)
+    for name, index, repeated, cells in iter_rows(path, sheet):
+        if sheet is None:
+            sheet = name
+        elif name != sheet:
+            # first sheet is over
+            break
+        if index <= row < index + repeated:
+            for text, count in cells:
+                if col < count:
+                    return text
+                col -= count
+            return u''
+        if index > row:
+            break
+    return u''
+
+
+def paragraphs(path):
+    """
+    Returns texts of paragraphs and headings in body of text document
+    """
+    texts = []
+    for event, elem, parents in _parse(path):
+        if elem.tag in [TEXT_P, TEXT_H] and any([x.tag == OFFICE_TEXT for x in parents]) and \
+                not any([x.tag in [TEXT_P, TEXT_H] for x in parents]):
+            texts.append(element_text(elem))
+            _drop(elem, parents)
+    return texts
+
+
+def slide_texts(path, number):
+    """
+    Returns texts of paragraphs on slide (or drawing page) number (1-based)
+    """
+    page = 0
+    for event, elem, parents in _parse(path):
+        if elem.tag == DRAW_PAGE:
+            page += 1
+            if page == number:
+                return [element_text(x) for x in elem.iter(TEXT_P)]
+            _drop(elem, parents)
+    raise ValueError("%s has no slide %d" % (path, number))
+
+
+def page_texts(path):
+    """
+    Returns list of texts of paragraphs of every slide (or drawing page)
+    """
+    pages = []
+    for event, elem, parents in _parse(path):
+        if elem.tag == DRAW_PAGE:
+            pages.append([element_text(x) for x in elem.iter(TEXT_P)])
+            _drop(elem, parents)
+    return pages
+
+
+def assert_readable(path):
+    """
+    Raise AssertionError if there is no parser for document
+    """
+    extension = os.path.splitext(path)[1].lower()
+    assert extension in ODF_EXTENSIONS or (extension == '.xls' and xlrd is not None), \
+        "Unable to read %s without GUI" % os.path.basename(path)
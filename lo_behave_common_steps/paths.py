@@ -0,0 +1,20 @@
+# -*- coding: UTF-8 -*-
+
+# Directory of the current scenario sandbox (see Sandbox)
+SANDBOX = {'path': None}
+
+
+def set_sandbox(path):
+    """
+    Set directory {sandbox} placeholder in feature files stands for
+    """
+    SANDBOX['path'] = path
+
+
+def resolve_path(path):
+    """
+    Replace {sandbox} placeholder used in feature files with the directory
+    of the current scenario sandbox
+    """
+    assert '{sandbox}' not in path or SANDBOX['path'], "No sandbox is set for the scenario"
+    return path.replace('{sandbox}', SANDBOX['path'] or '')
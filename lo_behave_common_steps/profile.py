@@ -0,0 +1,112 @@
+# -*- coding: UTF-8 -*-
+import hashlib
+import os
+import shutil
+import tempfile
+from distutils.spawn import find_executable
+from subprocess import call
+
+
+def program_dir():
+    """
+    Returns 'program' directory of installed LibreOffice
+    """
+    soffice = find_executable('soffice')
+    assert soffice, "soffice binary not found"
+    return os.path.dirname(os.path.realpath(soffice))
+
+
+def version_info():
+    """
+    Returns dict of values in versionrc of installed LibreOffice
+    """
+    info = {}
+    versionrc = os.path.join(program_dir(), 'versionrc')
+    if os.path.isfile(versionrc):
+        for line in open(versionrc):
+            if '=' in line:
+                key, value = line.split('=', 1)
+                info[key.strip()] = value.strip()
+    return info
+
+
+def build_id():
+    """
+    Returns id which changes whenever installed LibreOffice build changes
+    """
+    digest = hashlib.sha1()
+    for name in ['versionrc', 'soffice.bin']:
+        path = os.path.join(program_dir(), name)
+        if os.path.exists(path):
+            stat = os.stat(path)
+            digest.update("%s %d %d" % (name, stat.st_size, stat.st_mtime))
+    return digest.hexdigest()[:16]
+
+
+def libreoffice_version():
+    """
+    Returns human readable version of installed LibreOffice build
+    """
+    info = version_info()
+    if 'ProductMajor' in info:
+        return "%s.%s-%s" % (info['ProductMajor'], info.get('ProductMinor', ''), info.get('buildid', build_id()))
+    return build_id()
+
+
+def user_installation_url(path):
+    """
+    Returns value for -env:UserInstallation option
+    """
+    return 'file://' + os.path.abspath(path)
+
+
+class ProfileCache(object):
+    """
+    Pristine, fully initialised LibreOffice user installation built once
+    per LibreOffice build (the first start of soffice with an empty profile
+    is expensive). Scenarios get cheap clones of it.
+    """
+    def __init__(self, root=None):
+        cache_home = os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache'))
+        self.root = root or os.path.join(cache_home, 'lo-behave', 'profiles')
+
+    def path(self):
+        return os.path.join(self.root, build_id())
+
+    def build(self, timeout=120):
+        """
+        Build the profile for installed LibreOffice unless it exists,
+        profiles of other builds are removed. Returns its path.
+        """
+        path = self.path()
+        if os.path.isdir(path):
+            return path
+
+        if not os.path.isdir(self.root):
+            os.makedirs(self.root)
+        tmp = tempfile.mkdtemp(prefix='build-', dir=self.root)
+        rc = call(['timeout', str(timeout), os.path.join(program_dir(), 'soffice'), '--headless',
+                   '--norestore', '--terminate_after_init',
+                   '-env:UserInstallation=%s' % user_installation_url(tmp)])
+        if rc != 0 or not os.path.isdir(os.path.join(tmp, 'user')):
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise Exception("Building LibreOffice profile failed (%d)" % rc)
+
+        for name in os.listdir(self.root):
+            if not name.startswith('build-'):
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+        try:
+            os.rename(tmp, path)
+        except OSError:
+            # other process built it in the meantime
+            shutil.rmtree(tmp, ignore_errors=True)
+        return path
+
+    def clone(self, target):
+        """
+        Replace target with a copy of the pristine profile, returns target
+        """
+        source = self.build()
+        shutil.rmtree(target, ignore_errors=True)
+        shutil.copytree(source, target, symlinks=True)
+        return target
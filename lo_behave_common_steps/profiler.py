@@ -0,0 +1,232 @@
+# -*- coding: UTF-8 -*-
+import json
+import os
+import sqlite3
+import sys
+import threading
+from time import time
+
+# Functions of step modules whose time is reported separately
+INSTRUMENTED = {
+    'sleep': 'sleep',
+    'typeText': 'typing',
+    'pressKey': 'typing',
+    'keyCombo': 'typing',
+}
+
+# Modules typing goes through outside of step modules: dogtail.rawinput
+# (Node.typeText calls it) and keystroke fallback of insert_text. Only their
+# typing functions are replaced (sleeps of clicks etc. are not step sleeps).
+INSTRUMENTED_MODULES = ['dogtail.rawinput', 'lo_behave_common_steps.text']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY, version TEXT, started REAL);
+CREATE TABLE IF NOT EXISTS timings (run INTEGER, kind TEXT, name TEXT, seconds REAL,
+                                    sleep REAL, typing REAL, startup REAL);
+CREATE INDEX IF NOT EXISTS timings_name ON timings (kind, name);
+CREATE TABLE IF NOT EXISTS metrics (run INTEGER, name TEXT, metric TEXT, value REAL);
+"""
+
+
+def history_path():
+    """
+    Returns path of run history database (kept across runs)
+    """
+    cache_home = os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(cache_home, 'lo-behave', 'history.sqlite')
+
+
+def median(values):
+    values = sorted(values)
+    if not values:
+        return None
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2.0
+
+
+class Profiler(object):
+    """
+    Records wall time of steps and scenarios together with time spent in
+    sleep, typing and soffice startup. Timings are stored to SQLite history
+    keyed by LibreOffice version and compared with previous runs.
+    """
+    def __init__(self, version, history=None, runs=10, threshold=1.5, minimum=0.5):
+        self.version = version
+        self.history = history or history_path()
+        self.runs = runs
+        self.threshold = threshold
+        self.minimum = minimum
+        self.started = time()
+        self.spent = {'sleep': 0.0, 'typing': 0.0, 'startup': 0.0}
+        self.records = []
+        self.step_start = None
+        self.step_spent = None
+        self.scenario_start = None
+        self.scenario_spent = None
+        # measured call in progress, nested calls (typeText calls pressKey and
+        # sleep) are accounted to the outer one only
+        self.active = False
+
+    def _wrap(self, function, kind):
+        def wrapper(*args, **kwargs):
+            # waits of background threads are not part of the steps
+            if self.active or threading.current_thread().name != 'MainThread':
+                return function(*args, **kwargs)
+            self.active = True
+            start = time()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.active = False
+                self.spent[kind] += time() - start
+        wrapper.profiled = function
+        return wrapper
+
+    def instrument(self, registry, steps_dir):
+        """
+        Replace sleep and typing functions in globals of step modules
+        (those loaded by behave and those imported by other step modules)
+        and of INSTRUMENTED_MODULES
+        """
+        # namespace id: (namespace, kinds of functions to replace)
+        namespaces = {}
+        everything = set(INSTRUMENTED.values())
+        for matchers in registry.steps.values():
+            for matcher in matchers:
+                namespaces[id(matcher.func.func_globals)] = (matcher.func.func_globals, everything)
+        for module in sys.modules.values():
+            path = getattr(module, '__file__', None)
+            if path and os.path.dirname(os.path.abspath(path)) == os.path.abspath(steps_dir):
+                namespaces[id(module.__dict__)] = (module.__dict__, everything)
+        for name in INSTRUMENTED_MODULES:
+            if sys.modules.get(name) is not None:
+                namespaces.setdefault(id(sys.modules[name].__dict__), (sys.modules[name].__dict__, set(['typing'])))
+        for namespace, kinds in namespaces.values():
+            for name, kind in INSTRUMENTED.items():
+                if kind in kinds and name in namespace and not hasattr(namespace[name], 'profiled'):
+                    namespace[name] = self._wrap(namespace[name], kind)
+
+    def add_startup(self, seconds):
+        """
+        Account soffice startup (LOApp.coldStarts/warmStarts) to current step
+        """
+        self.spent['startup'] += seconds
+
+    def start_scenario(self):
+        self.scenario_start = time()
+        self.scenario_spent = dict(self.spent)
+
+    def start_step(self):
+        self.step_start = time()
+        self.step_spent = dict(self.spent)
+
+    def _record(self, kind, path, start, spent):
+        delta = dict([(x, self.spent[x] - spent[x]) for x in self.spent])
+        self.records.append({'kind': kind, 'path': path, 'seconds': time() - start,
+                             'sleep': delta['sleep'], 'typing': delta['typing'],
+                             'startup': delta['startup']})
+
+    def end_step(self, feature, scenario, step):
+        self._record('step', [feature, scenario, step], self.step_start, self.step_spent)
+
+    def end_scenario(self, feature, scenario):
+        self._record('scenario', [feature, scenario], self.scenario_start, self.scenario_spent)
+
+    def record_benchmark(self, name, seconds, **metrics):
+        """
+        Store result of a benchmark scenario, it is compared with previous runs like steps.
+        Other measurements (e.g. rss_mb=...) are stored to history too.
+        """
+        self.records.append({'kind': 'benchmark', 'path': [name], 'seconds': seconds,
+                             'sleep': 0.0, 'typing': 0.0, 'startup': 0.0, 'metrics': metrics})
+
+    def _connect(self):
+        if not os.path.isdir(os.path.dirname(self.history)):
+            os.makedirs(os.path.dirname(self.history))
+        db = sqlite3.connect(self.history)
+        db.executescript(SCHEMA)
+        return db
+
+    def _name(self, record):
+        return u' / '.join(record['path'])
+
+    def regressions(self, db):
+        """
+        Returns list of (kind, name, median now, median before) of steps and
+        benchmarks whose median time grew over threshold against previous runs
+        of the same LibreOffice version
+        """
+        previous = [x[0] for x in db.execute(
+            "SELECT id FROM runs WHERE version = ? ORDER BY id DESC LIMIT ?", (self.version, self.runs))]
+        if not previous:
+            return []
+        now = {}
+        for record in self.records:
+            if record['kind'] in ['step', 'benchmark']:
+                now.setdefault((record['kind'], self._name(record)), []).append(record['seconds'])
+        found = []
+        marks = ','.join(['?'] * len(previous))
+        for (kind, name), values in sorted(now.items()):
+            before = median([x[0] for x in db.execute(
+                "SELECT seconds FROM timings WHERE kind = ? AND name = ? AND run IN (%s)" % marks,
+                [kind, name] + previous)])
+            current = median(values)
+            if before is not None and current > before * self.threshold and current - before > self.minimum:
+                found.append((kind, name, current, before))
+        return found
+
+    def save(self):
+        """
+        Compare timings with history and store them, returns regressions
+        """
+        db = self._connect()
+        try:
+            found = self.regressions(db)
+            run = db.execute("INSERT INTO runs (version, started) VALUES (?, ?)",
+                             (self.version, self.started)).lastrowid
+            db.executemany("INSERT INTO timings VALUES (?, ?, ?, ?, ?, ?, ?)",
+                           [(run, x['kind'], self._name(x), x['seconds'], x['sleep'], x['typing'], x['startup'])
+                            for x in self.records])
+            db.executemany("INSERT INTO metrics VALUES (?, ?, ?, ?)",
+                           [(run, self._name(x), metric, value) for x in self.records
+                            for metric, value in sorted(x.get('metrics', {}).items())])
+            db.commit()
+        finally:
+            db.close()
+        return found
+
+    def write_json(self, path, regressions=()):
+        data = {'version': self.version, 'started': self.started, 'records': self.records,
+                'regressions': [dict(zip(['kind', 'name', 'median', 'previous'], x)) for x in regressions]}
+        json.dump(data, open(path, 'w'), indent=2)
+
+    def write_folded(self, path):
+        """
+        Write step timings in folded stacks format (input of flamegraph.pl),
+        time of step itself is split to sleep, typing and startup frames
+        """
+        lines = []
+        for record in self.records:
+            if record['kind'] != 'step':
+                continue
+            stack = u';'.join([x.replace(u';', u',') for x in record['path']])
+            own = record['seconds'] - record['sleep'] - record['typing'] - record['startup']
+            lines.append(u"%s %d" % (stack, max(own, 0) * 1000))
+            for kind in ['sleep', 'typing', 'startup']:
+                if record[kind]:
+                    lines.append(u"%s;%s %d" % (stack, kind, record[kind] * 1000))
+        open(path, 'w').write(u"\n".join(lines).encode('utf-8') + "\n")
+
+    def report(self, directory):
+        """
+        Store history and write profile.json and profile.folded to directory,
+        returns regressions
+        """
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        found = self.save()
+        self.write_json(os.path.join(directory, 'profile.json'), found)
+        self.write_folded(os.path.join(directory, 'profile.folded'))
+        return found
@@ -0,0 +1,71 @@
+# -*- coding: UTF-8 -*-
+import csv
+import os
+import random
+from cgi import escape
+
+NAMES = [u'Spider man', u'Batman', u'Thor', u'Thor sister', u'コンサート', u'昨夜, 最高', u'サー', u'Доброе утро!']
+STREETS = [u'Some address', u'でした', u'утро', u'ř']
+
+
+def generate_records(count, seed=0):
+    """
+    Yields count records [id, name, address, phone] (the same for the same seed)
+    """
+    generator = random.Random(seed)
+    for number in xrange(count):
+        yield [unicode(number + 1), u'%s %d' % (generator.choice(NAMES), number),
+               u'%s %d' % (generator.choice(STREETS), generator.randint(1, 999)),
+               unicode(generator.randint(100000, 999999999))]
+
+
+def write_csv(path, columns, rows):
+    """
+    Write header and rows to CSV file (UTF-8) row by row
+    """
+    with open(path + '.tmp', 'wb') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow([x.encode('utf-8') for x in columns])
+        for row in rows:
+            writer.writerow([x.encode('utf-8') for x in row])
+    os.rename(path + '.tmp', path)
+
+
+def generated_csv(directory, count, columns, seed=0):
+    """
+    Returns path of CSV file with count generated records (made only once)
+    """
+    path = os.path.join(directory, 'records-%d-%d.csv' % (count, seed))
+    if not os.path.exists(path):
+        write_csv(path, columns, generate_records(count, seed))
+    return path
+
+
+def read_csv(path):
+    """
+    Returns (columns, rows) of CSV file, rows are read lazily
+    """
+    csv_file = open(path, 'rb')
+    reader = csv.reader(csv_file)
+    columns = [x.decode('utf-8') for x in next(reader)]
+
+    def rows():
+        try:
+            for row in reader:
+                if row:
+                    yield [x.decode('utf-8') for x in row]
+        finally:
+            csv_file.close()
+    return columns, rows()
+
+
+def to_html(columns, rows):
+    """
+    Returns HTML table of columns and rows (Base pastes HTML or RTF, not plain text)
+    """
+    lines = [u'<html><body><table>',
+             u'<tr>%s</tr>' % u''.join([u'<th>%s</th>' % escape(x) for x in columns])]
+    for row in rows:
+        lines.append(u'<tr>%s</tr>' % u''.join([u'<td>%s</td>' % escape(x) for x in row]))
+    lines.append(u'</table></body></html>')
+    return u'\n'.join(lines)
@@ -0,0 +1,156 @@
+# -*- coding: UTF-8 -*-
+import hashlib
+import os
+import shutil
+import tempfile
+
+# soffice opens documents read-write, they get own copy instead of a hardlink
+# (writing to a hardlink would change the shared template)
+COPIED_EXTENSIONS = ['.odt', '.ods', '.odp', '.odg', '.odb', '.doc', '.docx',
+                     '.xls', '.xlsx', '.ppt', '.pptx', '.rtf', '.csv']
+
+
+def default_root():
+    """
+    Returns directory sandboxes are created in: LO_SANDBOX_ROOT or tmpfs (/dev/shm)
+    """
+    if os.environ.get('LO_SANDBOX_ROOT'):
+        return os.environ['LO_SANDBOX_ROOT']
+    if os.path.isdir('/dev/shm'):
+        return '/dev/shm/lo-behave-%d' % os.getuid()
+    return os.path.join(tempfile.gettempdir(), 'lo-behave-%d' % os.getuid())
+
+
+def _files(directory):
+    """
+    Returns sorted paths of all files under directory, relative to it
+    """
+    found = []
+    for dirpath, dirnames, filenames in os.walk(directory):
+        for filename in filenames:
+            found.append(os.path.relpath(os.path.join(dirpath, filename), directory))
+    return sorted(found)
+
+
+class Sandbox(object):
+    """
+    Private scenario directory on tmpfs. Fixtures are hardlinked (documents
+    are copied) from a template named by hash of their content (shared by all
+    processes using the same fixtures), reset() restores only the files
+    which were changed.
+
+    Layout of the sandbox mirrors what scenarios used to have in /tmp, i.e.
+    fixtures directory 'test_files' is at {sandbox}/test_files.
+    """
+    def __init__(self, fixtures, root=None, prefix='sandbox', copied=None):
+        self.fixtures = os.path.abspath(fixtures)
+        self.name = os.path.basename(self.fixtures)
+        self.root = root or default_root()
+        self.path = os.path.join(self.root, '%s-%d' % (prefix, os.getpid()))
+        self.copied = copied or COPIED_EXTENSIONS
+        self.template = None
+        self.manifest = {}
+        # (inode, size, mtime) of restored files in the sandbox
+        self.restored = {}
+
+    def _digest(self, directory):
+        digest = hashlib.sha1()
+        for relpath in _files(directory):
+            digest.update(relpath)
+            digest.update(open(os.path.join(directory, relpath), 'rb').read())
+        return digest.hexdigest()[:16]
+
+    def _build_template(self):
+        """
+        Copy fixtures to template directory (atomically, other processes may do the same)
+        """
+        if os.path.isdir(self.template):
+            return
+        tmp = tempfile.mkdtemp(prefix='template-', dir=self.root)
+        shutil.copytree(self.fixtures, os.path.join(tmp, self.name))
+        try:
+            os.rename(tmp, self.template)
+        except OSError:
+            # somebody else was faster
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def _stat(self, path):
+        stat = os.stat(path)
+        return stat.st_ino, stat.st_size, stat.st_mtime
+
+    def _template_intact(self):
+        """
+        Linked file changed in place changes the template as well
+        """
+        try:
+            return all([self._stat(os.path.join(self.template, x)) == self.manifest[x]
+                        for x in self.manifest])
+        except OSError:
+            return False
+
+    def prepare(self):
+        """
+        Make sure the template exists and create empty sandbox directory
+        """
+        if not os.path.isdir(self.root):
+            os.makedirs(self.root)
+        digest = self._digest(self.fixtures)
+        self.template = os.path.join(self.root, 'template-%s' % digest)
+        if os.path.isdir(self.template) and \
+                self._digest(os.path.join(self.template, self.name)) != digest:
+            shutil.rmtree(self.template, ignore_errors=True)
+        self._build_template()
+        self.manifest = dict([(x, self._stat(os.path.join(self.template, x)))
+                              for x in _files(self.template)])
+        self.restored = {}
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+
+    def _restore(self, relpath):
+        target = os.path.join(self.path, relpath)
+        if os.path.lexists(target):
+            os.remove(target)
+        if not os.path.isdir(os.path.dirname(target)):
+            os.makedirs(os.path.dirname(target))
+        source = os.path.join(self.template, relpath)
+        if os.path.splitext(relpath)[1].lower() in self.copied:
+            shutil.copy2(source, target)
+        else:
+            try:
+                os.link(source, target)
+            except OSError:
+                shutil.copy2(source, target)
+        self.restored[relpath] = self._stat(target)
+
+    def reset(self):
+        """
+        Bring sandbox to the state of fixtures: remove files created by the
+        scenario and restore files whose inode, size or mtime changed.
+        Returns number of restored files.
+        """
+        if self.template is None or not self._template_intact():
+            self.prepare()
+
+        for relpath in _files(self.path):
+            if relpath not in self.manifest:
+                os.remove(os.path.join(self.path, relpath))
+        for dirpath, dirnames, filenames in os.walk(self.path, topdown=False):
+            if dirpath != self.path and not os.listdir(dirpath):
+                os.rmdir(dirpath)
+
+        restored = 0
+        for relpath in self.manifest:
+            try:
+                current = self._stat(os.path.join(self.path, relpath))
+            except OSError:
+                current = None
+            if current is None or current != self.restored.get(relpath):
+                self._restore(relpath)
+                restored += 1
+        return restored
+
+    def remove(self):
+        """
+        Remove the sandbox directory (template stays for next runs)
+        """
+        shutil.rmtree(self.path, ignore_errors=True)
@@ -0,0 +1,134 @@
+# -*- coding: UTF-8 -*-
+import os
+import tempfile
+import threading
+from Queue import Queue
+from subprocess import call
+
+import pyatspi
+
+try:
+    from gi.repository import Gdk
+except ImportError:
+    Gdk = None
+
+
+def extents(node):
+    """
+    Returns (x, y, width, height) of accessible on screen
+    """
+    box = node.queryComponent().getExtents(pyatspi.DESKTOP_COORDS)
+    return box.x, box.y, box.width, box.height
+
+
+def capture(node=None):
+    """
+    Returns pixbuf with screen area of accessible (whole screen if node is None)
+    or None if the X server cannot be read directly
+    """
+    if Gdk is None:
+        return None
+    screen = Gdk.get_default_root_window()
+    if screen is None:
+        return None
+    x, y, width, height = 0, 0, screen.get_width(), screen.get_height()
+    if node is not None:
+        try:
+            left, top, w, h = extents(node)
+        except Exception:
+            left, top, w, h = x, y, width, height
+        # clip to the screen
+        x, y = max(left, 0), max(top, 0)
+        width = min(left + w, screen.get_width()) - x
+        height = min(top + h, screen.get_height()) - y
+        if width <= 0 or height <= 0:
+            x, y, width, height = 0, 0, screen.get_width(), screen.get_height()
+    return Gdk.pixbuf_get_from_window(screen, x, y, width, height)
+
+
+def gnome_screenshot():
+    """
+    Returns JPEG of whole screen made by gnome-screenshot
+    """
+    fd, path = tempfile.mkstemp(prefix='screenshot-', suffix='.jpg')
+    os.close(fd)
+    try:
+        call(['gnome-screenshot', '-f', path])
+        return open(path, 'rb').read()
+    finally:
+        os.remove(path)
+
+
+class Screenshots(object):
+    """
+    Screenshots are grabbed to memory, compressing them is left to a worker
+    thread. Finished images are picked up by done(), images still being
+    encoded at that time are written to files in directory.
+    """
+    def __init__(self, format='png', directory=None):
+        self.format = format
+        self.mime = 'image/%s' % format
+        self.directory = directory or os.path.join(tempfile.gettempdir(), 'lo-behave-screenshots')
+        self.queue = Queue()
+        self.results = []
+        # id: label of queued screenshots, id: path of those handed over to files
+        self.pending = {}
+        self.files = {}
+        self.taken = 0
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self._encode)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _encode(self):
+        while True:
+            number, pixbuf = self.queue.get()
+            try:
+                data = pixbuf.save_to_bufferv(self.format, [], [])[1]
+                error = None
+            except Exception as e:
+                data, error = None, e
+            with self.lock:
+                label = self.pending.pop(number, None)
+                path = self.files.pop(number, None)
+                if label is not None:
+                    if error is not None:
+                        label = "%s (encoding failed: %s)" % (label, error)
+                    self.results.append((label, self.mime, data))
+            if path is not None and data:
+                with open(path, 'wb') as image:
+                    image.write(data)
+            self.queue.task_done()
+
+    def take(self, label, node=None):
+        """
+        Grab the screen area of node (e.g. the failing window) to be encoded
+        """
+        pixbuf = capture(node)
+        if pixbuf is not None:
+            with self.lock:
+                self.taken += 1
+                self.pending[self.taken] = label
+            self.queue.put((self.taken, pixbuf))
+        else:
+            with self.lock:
+                self.results.append((label, 'image/jpg', gnome_screenshot()))
+
+    def done(self, wait=False):
+        """
+        Returns list of (label, mime type, data) of encoded screenshots and
+        forgets them. Waits for pending ones if wait is set, otherwise they
+        are returned as text with path of the file they will be written to.
+        """
+        if wait:
+            self.queue.join()
+        with self.lock:
+            results, self.results = self.results, []
+            for number, label in sorted(self.pending.items()):
+                if not os.path.isdir(self.directory):
+                    os.makedirs(self.directory)
+                path = os.path.join(self.directory, 'screenshot-%d-%d.%s' % (os.getpid(), number, self.format))
+                self.files[number] = path
+                results.append((label, 'text/plain', "Screenshot of %s is being written to %s" % (label, path)))
+            self.pending = {}
+        return results
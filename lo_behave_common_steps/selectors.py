@@ -0,0 +1,177 @@
+# -*- coding: UTF-8 -*-
+import re
+
+import pyatspi
+from dogtail.tree import SearchError
+
+# Tokens of selector like 'dialog > "push button"[name="Finish"]:showing',
+# roles with spaces are quoted or written with dashes (push-button)
+TOKEN_RE = re.compile(r'''
+    \s*(?P<combinator>>)\s*
+  | (?P<space>\s+)
+  | "(?P<quoted_role>[^"]*)"
+  | (?P<role>\*|[a-z][a-z_-]*)
+  | \[\s*name\s*(?P<op>\*?=)\s*(?:"(?P<quoted_value>[^"]*)"|(?P<value>[^\]]*?))\s*\]
+  | :(?P<state>[a-z_-]+)
+''', re.VERBOSE)
+
+# Role names as dogtail reports them ('push button')
+ROLES = dict([(x[5:].lower().replace('_', ' '), getattr(pyatspi, x)) for x in dir(pyatspi) if x.startswith('ROLE_')])
+
+# Compiled selectors
+SELECTORS = {}
+
+
+def _unicode(text):
+    # pyatspi returns names as UTF-8 str
+    if isinstance(text, str):
+        return text.decode('utf-8')
+    return text
+
+
+class Compound(object):
+    """
+    One step of selector: role, name condition and states of a node
+    """
+    def __init__(self):
+        self.role = None
+        self.name = None
+        self.contains = False
+        self.states = []
+
+    def state_set(self):
+        states = pyatspi.StateSet()
+        for state in self.states:
+            states.add(state)
+        return states
+
+    def matches_name(self, node):
+        if self.name is None:
+            return True
+        name = _unicode(node.name)
+        if self.contains:
+            return self.name in name
+        return name == self.name
+
+    def matches(self, node):
+        """
+        Client side check (fallback when Collection is not available)
+        """
+        if self.role is not None and node.getRole() != self.role:
+            return False
+        if self.states:
+            state_set = node.getState()
+            if not all([state_set.contains(x) for x in self.states]):
+                return False
+        return self.matches_name(node)
+
+    def rule(self, collection):
+        """
+        Collection match rule of role and states (names are checked client side)
+        """
+        return collection.createMatchRule(
+            self.state_set().raw(), pyatspi.Collection.MATCH_ALL,
+            {}, pyatspi.Collection.MATCH_ALL,
+            [self.role] if self.role is not None else [], pyatspi.Collection.MATCH_ANY,
+            "", pyatspi.Collection.MATCH_ALL, False)
+
+
+class Selector(object):
+    """
+    Compiled selector like 'dialog > "push button"[name=Finish]:showing'.
+    Descendants (' ') are matched by AT-SPI Collection in the application
+    (one round trip), children ('>') are checked client side.
+    """
+    def __init__(self, text):
+        self.text = text
+        self.steps = []
+        combinator = ' '
+        compound = None
+        position = 0
+        text = text.strip()
+        while position < len(text):
+            match = TOKEN_RE.match(text, position)
+            if not match or match.end() == position:
+                raise ValueError("Invalid selector '%s' at position %d" % (text, position))
+            position = match.end()
+            if match.group('combinator') or match.group('space'):
+                if compound is None:
+                    raise ValueError("Invalid selector '%s' at position %d" % (text, position))
+                self.steps.append((combinator, compound))
+                compound = None
+                combinator = '>' if match.group('combinator') else ' '
+                continue
+            if compound is None:
+                compound = Compound()
+            role = match.group('quoted_role') or match.group('role')
+            if role:
+                role = role.replace('-', ' ').replace('_', ' ')
+                if role != '*':
+                    if role not in ROLES:
+                        raise ValueError("Unknown role '%s' in selector '%s'" % (role, text))
+                    compound.role = ROLES[role]
+            elif match.group('op'):
+                compound.name = match.group('quoted_value')
+                if compound.name is None:
+                    compound.name = match.group('value')
+                compound.name = _unicode(compound.name)
+                compound.contains = match.group('op') == '*='
+            else:
+                state = getattr(pyatspi, 'STATE_%s' % match.group('state').upper().replace('-', '_'), None)
+                if state is None:
+                    raise ValueError("Unknown state '%s' in selector '%s'" % (match.group('state'), text))
+                compound.states.append(state)
+        if compound is None:
+            raise ValueError("Invalid selector '%s'" % text)
+        self.steps.append((combinator, compound))
+
+    def _descendants(self, node, compound):
+        try:
+            collection = node.queryCollection()
+        except NotImplementedError:
+            return [x for x in node.findChildren(compound.matches)]
+        matches = collection.getMatches(compound.rule(collection),
+                                        pyatspi.Collection.SORT_ORDER_CANONICAL, 0, True)
+        return [x for x in matches if compound.matches_name(x)]
+
+    def select(self, node):
+        """
+        Returns all nodes under node matching the selector (document order)
+        """
+        nodes = [node]
+        for combinator, compound in self.steps:
+            found = []
+            for parent in nodes:
+                if combinator == '>':
+                    candidates = [x for x in parent.children if compound.matches(x)]
+                else:
+                    candidates = self._descendants(parent, compound)
+                found.extend([x for x in candidates if x not in found])
+            nodes = found
+        return nodes
+
+
+def compile_selector(text):
+    """
+    Returns compiled Selector (compiled selectors are kept)
+    """
+    if text not in SELECTORS:
+        SELECTORS[text] = Selector(text)
+    return SELECTORS[text]
+
+
+def select(node, selector):
+    """
+    Returns list of nodes under node matching selector
+    """
+    return compile_selector(selector).select(node)
+
+
+def select_one(node, selector):
+    """
+    Returns the first node under node matching selector
+    """
+    nodes = select(node, selector)
+    if not nodes:
+        raise SearchError("Nothing matches selector '%s'" % selector)
+    return nodes[0]
@@ -0,0 +1,85 @@
+# -*- coding: UTF-8 -*-
+from time import time
+
+from dogtail.config import config
+from dogtail.rawinput import keyCombo, pressKey
+
+# Number of texts injected through EditableText and estimated seconds saved
+# against typing them key by key
+STATS = {'injected': 0, 'saved': 0.0}
+
+
+def _unicode(text):
+    if isinstance(text, str):
+        return text.decode('utf-8')
+    return text
+
+
+def _editable(node):
+    try:
+        return node.queryEditableText()
+    except NotImplementedError:
+        return None
+
+
+def _read(node):
+    text = node.queryText()
+    return _unicode(text.getText(0, -1)), text.caretOffset
+
+
+def _record(text, start):
+    STATS['injected'] += 1
+    STATS['saved'] += max(0.0, len(text) * config.typingDelay - (time() - start))
+
+
+def typing_counters():
+    """
+    Returns (number of injected texts, estimated seconds saved) tuple
+    """
+    return STATS['injected'], STATS['saved']
+
+
+def insert_text(node, text, keystrokes=False):
+    """
+    Insert text at the caret of node through AT-SPI EditableText interface
+    and verify it by reading the text back. Text is typed key by key when
+    node is not editable, the result does not match, or keystrokes is True
+    (i.e. the key events are what is under test).
+    Returns True when the text was injected.
+    """
+    text = _unicode(text)
+    editable = None if keystrokes else _editable(node)
+    if editable is not None:
+        start = time()
+        old_text, offset = _read(node)
+        if offset < 0 or offset > len(old_text):
+            offset = len(old_text)
+        # length is in bytes of the UTF-8 string
+        encoded = text.encode('utf-8')
+        if editable.insertText(offset, encoded, len(encoded)):
+            if _read(node)[0] == old_text[:offset] + text + old_text[offset:]:
+                _record(text, start)
+                return True
+            editable.setTextContents(old_text.encode('utf-8'))
+
+    node.typeText(text)
+    return False
+
+
+def replace_text(node, text, keystrokes=False):
+    """
+    Replace whole text of node, same as insert_text otherwise
+    """
+    text = _unicode(text)
+    editable = None if keystrokes else _editable(node)
+    if editable is not None:
+        start = time()
+        if editable.setTextContents(text.encode('utf-8')) and _read(node)[0] == text:
+            _record(text, start)
+            return True
+
+    node.grabFocus()
+    keyCombo("<CTRL>a")
+    pressKey("del")
+    node.typeText(text)
+    return False
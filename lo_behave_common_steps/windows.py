@@ -0,0 +1,109 @@
+# -*- coding: UTF-8 -*-
+import pyatspi
+
+from lo_behave_common_steps.events import register, deregister, pump_events, wait_for
+
+
+class WindowTracker(object):
+    """
+    Keeps an ordered stack of live top-level windows (frames and dialogs)
+    of one application. The stack is fed by AT-SPI window events, so waiting
+    for a window returns as soon as the event arrives instead of polling.
+    """
+    EVENTS = ('window:create', 'window:activate', 'window:destroy',
+              'object:property-change:accessible-name')
+
+    def __init__(self, appName):
+        self.appName = appName
+        self.stack = []
+        self.listening = False
+
+    def start(self):
+        """
+        Start listening to window events
+        """
+        if not self.listening:
+            register(self._on_event, *self.EVENTS)
+            self.listening = True
+        self.refresh()
+
+    def stop(self):
+        """
+        Stop listening to window events
+        """
+        if self.listening:
+            deregister(self._on_event, *self.EVENTS)
+            self.listening = False
+        self.reset()
+
+    def reset(self):
+        """
+        Forget all windows (e.g. after the application was killed, because
+        no window:destroy events are emitted then)
+        """
+        self.stack = []
+
+    def refresh(self):
+        """
+        Seed the stack from the current top-level children of the application
+        """
+        self.stack = []
+        desktop = pyatspi.Registry.getDesktop(0)
+        for app in desktop:
+            try:
+                if app is not None and app.name == self.appName:
+                    self.stack.extend([x for x in app if x is not None])
+            except Exception:
+                # application is just going away
+                continue
+
+    def _on_event(self, event):
+        try:
+            app = event.host_application
+            if app is None or app.name != self.appName:
+                return
+        except Exception:
+            return
+
+        window = event.source
+        if event.type.startswith('object:property-change'):
+            # only wakes up waiters, title of a known window has changed
+            return
+        if window in self.stack:
+            self.stack.remove(window)
+        if not event.type.startswith('window:destroy'):
+            self.stack.append(window)
+
+    def current(self):
+        """
+        Returns the most recently created or activated window (or None)
+        """
+        pump_events()
+        if not self.stack:
+            self.refresh()
+        if self.stack:
+            return self.stack[-1]
+        return None
+
+    def wait_for_window(self, name=None, like=None, predicate=None, timeout=10):
+        """
+        Wait until the current window has title equal to name, containing
+        like and/or satisfying predicate. Returns the window or None on timeout.
+        """
+        def matches():
+            window = self.current()
+            if window is None:
+                return None
+            try:
+                if name is not None and window.name != name:
+                    return None
+                if like is not None and like not in window.name:
+                    return None
+                if predicate is not None and not predicate(window):
+                    return None
+            except Exception:
+                # window was destroyed in the meantime
+                return None
+            return window
+
+        return wait_for(matches, timeout=timeout)
@@ -0,0 +1,270 @@
+#!/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+Run behave scenarios in parallel. Every worker has its own headless session:
+Xvfb display, D-Bus session bus (and so its own a11y bus), HOME with
+LibreOffice profile and scratch directory (for sandboxes and temporary
+files). Results of all scenarios are merged into one behave json report.
+
+Example: python run_parallel.py -j 4 -t soffice_file_open -o /tmp/report.json
+"""
+import argparse
+import glob
+import json
+import os
+import shlex
+import shutil
+import sys
+import tempfile
+import threading
+from Queue import Queue, Empty
+from signal import SIGKILL
+from subprocess import Popen, PIPE, call
+from time import sleep, time
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+DEVNULL = open(os.devnull, 'w')
+
+
+def find_scenarios(feature_files, tags=None, exclude_tags=None):
+    """
+    Returns list of (location, name) of scenarios and of example rows of scenario
+    outlines having any of tags (all if tags is empty) and none of exclude_tags
+    """
+    scenarios = []
+    for path in feature_files:
+        feature_tags, pending_tags = [], []
+        outline, outline_tags, in_examples, header_seen = None, [], False, False
+        relpath = os.path.relpath(path, REPO_DIR)
+
+        for number, line in enumerate(open(path).read().decode('utf-8').splitlines(), 1):
+            stripped = line.strip()
+            if not stripped or stripped.startswith('#'):
+                continue
+            if stripped.startswith('@'):
+                pending_tags.extend([x[1:] for x in stripped.split() if x.startswith('@')])
+                continue
+
+            found = []
+            if stripped.startswith('Feature:'):
+                feature_tags, pending_tags = pending_tags, []
+            elif stripped.startswith('Scenario Outline:') or stripped.startswith('Scenario Template:'):
+                outline = stripped.split(':', 1)[1].strip()
+                outline_tags, pending_tags, in_examples = feature_tags + pending_tags, [], False
+            elif stripped.startswith('Scenario:'):
+                outline, in_examples = None, False
+                found = [(stripped.split(':', 1)[1].strip(), feature_tags + pending_tags)]
+                pending_tags = []
+            elif stripped.startswith('Examples:') or stripped.startswith('Scenarios:'):
+                in_examples, header_seen = outline is not None, False
+                outline_tags, pending_tags = outline_tags + pending_tags, []
+            elif stripped.startswith('|') and in_examples:
+                if header_seen:
+                    found = [(u"%s %s" % (outline, stripped), outline_tags)]
+                header_seen = True
+
+            for name, scenario_tags in found:
+                if tags and not set(tags) & set(scenario_tags):
+                    continue
+                if exclude_tags and set(exclude_tags) & set(scenario_tags):
+                    continue
+                scenarios.append(("%s:%d" % (relpath, number), name))
+    return scenarios
+
+
+def free_display(start):
+    """
+    Returns first X display number from start which is not in use
+    """
+    display = start
+    while os.path.exists('/tmp/.X%d-lock' % display) or os.path.exists('/tmp/.X11-unix/X%d' % display):
+        display += 1
+    return display
+
+
+class Session(object):
+    """
+    Isolated headless session scenarios are executed in
+    """
+    def __init__(self, number, workdir, display, session_command=None):
+        self.number = number
+        self.workdir = workdir
+        self.display = display
+        self.session_command = session_command
+        self.processes = []
+        self.env = None
+
+    def start(self):
+        home = os.path.join(self.workdir, 'home')
+        runtime = os.path.join(self.workdir, 'run')
+        scratch = os.path.join(self.workdir, 'scratch')
+        for directory in [home, runtime, scratch]:
+            os.makedirs(directory)
+        os.chmod(runtime, 0700)
+
+        self.processes.append(Popen(['Xvfb', ':%d' % self.display, '-screen', '0', '1280x1024x24',
+                                     '-nolisten', 'tcp'], stdout=DEVNULL, stderr=DEVNULL))
+        deadline = time() + 10
+        while not os.path.exists('/tmp/.X11-unix/X%d' % self.display):
+            assert time() < deadline, "Xvfb on display :%d failed to start" % self.display
+            sleep(0.1)
+
+        env = dict(os.environ)
+        env.pop('DBUS_SESSION_BUS_ADDRESS', None)
+        env.update({
+            'DISPLAY': ':%d' % self.display,
+            'HOME': home,
+            'XDG_RUNTIME_DIR': runtime,
+            'XDG_CONFIG_HOME': os.path.join(home, '.config'),
+            'XDG_CACHE_HOME': os.path.join(home, '.cache'),
+            'XDG_DATA_HOME': os.path.join(home, '.local', 'share'),
+            'LO_SANDBOX_ROOT': scratch,
+            'TMPDIR': scratch,
+            'GNOME_ACCESSIBILITY': '1',
+            'QT_ACCESSIBILITY': '1',
+            'NO_AT_BRIDGE': '0',
+        })
+
+        # Own session bus means own a11y bus (launched on demand by at-spi-bus-launcher)
+        dbus = Popen(['dbus-daemon', '--session', '--nofork', '--print-address=1'],
+                     stdout=PIPE, env=env)
+        self.processes.append(dbus)
+        env['DBUS_SESSION_BUS_ADDRESS'] = dbus.stdout.readline().strip()
+        self.env = env
+
+        call(['gsettings', 'set', 'org.gnome.desktop.interface', 'toolkit-accessibility', 'true'],
+             env=env, stdout=DEVNULL, stderr=DEVNULL)
+        if self.session_command:
+            self.processes.append(Popen(shlex.split(self.session_command), env=env,
+                                        stdout=DEVNULL, stderr=DEVNULL))
+
+    def run(self, location, output):
+        """
+        Run one scenario, returns exit code of behave
+        """
+        cmd = ['behave', location, '-k', '-f', 'json', '-o', output + '.json',
+               '-f', 'plain', '-o', output + '.log']
+        return call(cmd, env=self.env, cwd=REPO_DIR, stdout=DEVNULL, stderr=DEVNULL)
+
+    def stop(self):
+        # leftovers of the scenario (soffice) are bound to our display
+        for pid in os.listdir('/proc') if self.env else []:
+            if not pid.isdigit():
+                continue
+            try:
+                environ = open('/proc/%s/environ' % pid).read().split('\0')
+            except IOError:
+                continue
+            if 'DISPLAY=:%d' % self.display in environ and 'HOME=%s' % self.env['HOME'] in environ:
+                try:
+                    os.kill(int(pid), SIGKILL)
+                except OSError:
+                    pass
+        for process in reversed(self.processes):
+            if process.poll() is None:
+                process.terminate()
+                process.wait()
+
+
+def worker(session, jobs, results, output_dir):
+    while True:
+        try:
+            index, location, name = jobs.get_nowait()
+        except Empty:
+            return
+        output = os.path.join(output_dir, 'scenario-%04d' % index)
+        start = time()
+        rc = session.run(location, output)
+        results.append((index, location, name, rc, output + '.json', time() - start))
+        print("[session %d] %s %s (%.1fs) %s" % (session.number, 'PASS' if rc == 0 else 'FAIL',
+                                                 location, time() - start, name.encode('utf-8')))
+        sys.stdout.flush()
+
+
+def merge_reports(results, report):
+    """
+    Merge behave json reports of single scenarios into one report
+    """
+    features = []
+    by_location = {}
+    for index, location, name, rc, path, duration in sorted(results):
+        try:
+            data = json.load(open(path))
+        except (IOError, ValueError):
+            data = [{'keyword': 'Feature', 'name': location.split(':')[0], 'location': location,
+                     'status': 'failed', 'elements': [
+                         {'keyword': 'Scenario', 'name': name, 'location': location,
+                          'status': 'failed', 'steps': []}]}]
+        for feature in data:
+            key = feature['location'].split(':')[0]
+            if key not in by_location:
+                by_location[key] = dict(feature, elements=[])
+                features.append(by_location[key])
+            merged = by_location[key]
+            merged['elements'].extend(feature.get('elements', []))
+            if feature.get('status') == 'failed':
+                merged['status'] = 'failed'
+
+    json.dump(features, open(report, 'w'), indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('-j', '--jobs', type=int, default=2, help='number of parallel sessions')
+    parser.add_argument('-t', '--tags', action='append', default=[], help='run scenarios with tag')
+    parser.add_argument('-x', '--exclude-tags', action='append', default=[], help='skip scenarios with tag')
+    parser.add_argument('-o', '--output', default='report.json', help='merged behave json report')
+    parser.add_argument('--display', type=int, default=100, help='first X display number to use')
+    parser.add_argument('--session-command', help='command started in every session (e.g. window manager)')
+    parser.add_argument('--keep', action='store_true', help='keep session directories')
+    parser.add_argument('features', nargs='*', help='feature files (features/*.feature by default)')
+    args = parser.parse_args()
+
+    feature_files = args.features or sorted(glob.glob(os.path.join(REPO_DIR, 'features', '*.feature')))
+    scenarios = find_scenarios(feature_files, args.tags, args.exclude_tags)
+    if not scenarios:
+        print("No scenario matches given tags")
+        return 1
+
+    workdir = tempfile.mkdtemp(prefix='lo-parallel-')
+    output_dir = os.path.join(workdir, 'output')
+    os.makedirs(output_dir)
+
+    jobs = Queue()
+    for index, (location, name) in enumerate(scenarios):
+        jobs.put((index, location, name))
+
+    sessions, threads, results = [], [], []
+    start = time()
+    try:
+        display = args.display
+        for number in range(0, min(args.jobs, len(scenarios))):
+            display = free_display(display)
+            session = Session(number, os.path.join(workdir, 'session-%d' % number), display,
+                              args.session_command)
+            sessions.append(session)
+            session.start()
+            display += 1
+
+        for session in sessions:
+            thread = threading.Thread(target=worker, args=(session, jobs, results, output_dir))
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+    finally:
+        for session in sessions:
+            session.stop()
+
+    merge_reports(results, args.output)
+    failed = [x for x in results if x[3] != 0]
+    print("%d scenarios in %d sessions: %d passed, %d failed, %.1fs" % (
+        len(results), len(sessions), len(results) - len(failed), len(failed), time() - start))
+
+    if not args.keep:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 1 if failed or len(results) != len(scenarios) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+#!/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+Run entries of testmapper.txt in one pass: the environment is provisioned
+once (runtest.sh --setup-only, skipped when already done) and all behave
+tags run inside one headless session. Every entry still gets its own html
+report and result.
+
+Example: python run_testmapper.py startViaCommand exportPdf
+"""
+import argparse
+import json
+import os
+import sys
+from distutils.spawn import find_executable
+from pipes import quote
+from subprocess import call
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+TESTMAPPER = os.path.join(REPO_DIR, 'testmapper.txt')
+RESULTS = '/tmp/testmapper-results.json'
+
+
+def parse_testmapper(path=TESTMAPPER):
+    """
+    Returns list of (name, workdir, command) entries of testmapper file
+    """
+    entries = []
+    for line in open(path):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        fields = [x.strip() for x in line.split(',')]
+        entries.append((fields[0], fields[1], fields[2]))
+    return entries
+
+
+def behave_tag(workdir, command):
+    """
+    Returns behave tag run by entry (None if entry is not a behave test)
+    """
+    args = command.split()
+    if workdir == '.' and len(args) == 2 and args[0] == './runtest.sh':
+        return args[1]
+    return None
+
+
+def report_path(name):
+    return '/tmp/report_%s.html' % name
+
+
+def run_in_session(names):
+    """
+    Runs behave for given entries one by one (inside the headless session)
+    and stores exit codes to RESULTS
+    """
+    results = {}
+    for name, workdir, command in parse_testmapper():
+        if name in names:
+            results[name] = call(['behave', '-t', behave_tag(workdir, command), '-k',
+                                  '-f', 'html', '-o', report_path(name), '-f', 'plain'], cwd=REPO_DIR)
+    json.dump(results, open(RESULTS, 'w'))
+    return 0
+
+
+def report(name, rc, log):
+    result = 'PASS' if rc == 0 else 'FAIL'
+    print("%s: %s" % (name, result))
+    if find_executable('rhts-report-result'):
+        call(['rhts-report-result', name, result, log])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--in-session', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--user', default='test', help='user running the headless session')
+    parser.add_argument('names', nargs='*', help='testmapper entries or behave tags (all by default)')
+    args = parser.parse_args()
+
+    entries = parse_testmapper()
+    if args.names:
+        entries = [x for x in entries if x[0] in args.names or behave_tag(x[1], x[2]) in args.names]
+    if args.in_session:
+        return run_in_session([x[0] for x in entries])
+
+    # Provision the machine (only the first time, runtest.sh keeps a stamp)
+    if call(['./runtest.sh', '--setup-only'], cwd=REPO_DIR) != 0:
+        print("Environment setup failed")
+        return 1
+
+    failed = 0
+    behave_entries = [x[0] for x in entries if behave_tag(x[1], x[2])]
+    if behave_entries:
+        if os.path.exists(RESULTS):
+            os.remove(RESULTS)
+        session_command = "python %s --in-session %s" % (
+            quote(os.path.abspath(__file__)), ' '.join([quote(x) for x in behave_entries]))
+        call(['sudo', '-u', args.user, 'dogtail-run-headless-next', session_command], cwd=REPO_DIR)
+        try:
+            results = json.load(open(RESULTS))
+        except (IOError, ValueError):
+            results = {}
+        for name in behave_entries:
+            rc = results.get(name, 1)
+            report(name, rc, report_path(name))
+            failed += rc != 0
+
+    # Entries with their own runner (e.g. upstream smoketest)
+    for name, workdir, command in entries:
+        if not behave_tag(workdir, command):
+            rc = call(command, shell=True, cwd=os.path.join(REPO_DIR, workdir), env=dict(os.environ, TEST=name))
+            print("%s: %s" % (name, 'PASS' if rc == 0 else 'FAIL'))
+            failed += rc != 0
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
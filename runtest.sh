@@ -6,8 +6,8 @@ env GIT_SSL_NO_VERIFY=true git submodule update --init --recursive
 
 function install_deps ()
 {
-    dnf -y install python-behave dogtail
-    dnf -y groupinstall "Basic Desktop" "GNOME" --allowerasing
+    dnf -y install python-behave dogtail xclip || return 1
+    dnf -y groupinstall "Basic Desktop" "GNOME" --allowerasing || return 1
 }
 
 function enable_sudo ()
@@ -17,7 +17,7 @@ function enable_sudo ()
 
 function env_preprequsites ()
 {
-    dnf -y install libreoffice* abrt-python jre
+    dnf -y install libreoffice* abrt-python jre || return 1
 
     # this is for weird auth dialog shown in overview mode
     dnf -y remove gnome-color-manager gnome-software
@@ -35,9 +35,16 @@ function env_preprequsites ()
     systemctl restart abrtd.service
 }
 
-enable_sudo
-install_deps
-env_preprequsites
+# Provisioning is done only once per machine (see run_testmapper.py)
+PROVISION_STAMP=/var/tmp/libreoffice-tests.provisioned
+if [ ! -f $PROVISION_STAMP ]; then
+    # a failed provisioning is repeated by the next run
+    enable_sudo && install_deps && env_preprequsites && touch $PROVISION_STAMP
+fi
+
+if [ "$1" == "--setup-only" ]; then
+    exit 0
+fi
 
 # Here we store exit code for the task in tmp file
 # Because we need a report
@@ -4,6 +4,7 @@ import sys
 import os
 import tempfile
 from subprocess import check_output, check_call, CalledProcessError, STDOUT
+import imp
 import logging
 
 test_dir = os.getcwd()
@@ -14,8 +15,22 @@ usr_dir = tempfile.mkdtemp(prefix='smoketest-')
 cppu = os.path.join(test_dir, 'bin', 'cppunittester')
 
 
+def clone_pristine_profile(target):
+    # profile.py has no dependencies (the package __init__ needs dogtail)
+    profile = imp.load_source('lo_profile', os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), '..', '..', 'lo_behave_common_steps', 'profile.py'))
+    try:
+        profile.ProfileCache().clone(target)
+    except Exception, err:
+        logging.warning("Pristine profile not used: %s" % err)
+        if not os.path.isdir(target):
+            os.makedirs(target)
+
+
 def run_smoketest():
     logging.info("Running smoketest ...")
+    # Clone of pristine profile, so LibreOffice does not build a new one
+    clone_pristine_profile(usr_dir)
 
     os.environ['JAVA_HOME'] = os.readlink(
         "/etc/alternatives/java").rstrip("bin/java")